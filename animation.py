@@ -0,0 +1,173 @@
+import struct
+import zlib
+from time import time
+from typing import BinaryIO
+
+import fractal
+import image_output
+import spirograph
+from fractal import RenderTimeout
+
+# Bump this whenever the frames or their timing change for the same parameters. Part of the render cache key.
+VERSION = 1
+FORMATS = ("gif", "apng")
+# Hard caps on top of the configured values.
+MAX_FRAMES = 120
+MAX_SIZE = 1024
+# Worst case encoded bytes per pixel of a frame. Gif frames are indexed, apng frames are RGB.
+BYTES_PER_PIXEL = {"gif": 1, "apng": 3}
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def frame_limit(frames: int, width: int, height: int, fmt: str, max_bytes: int) -> int:
+    """Cap a frame count so that even incompressible frames fit the upload limit.
+
+    Args:
+        frames (int): The requested amount of frames.
+        width (int): The frame width.
+        height (int): The frame height.
+        fmt (str): One of FORMATS.
+        max_bytes (int): The upload limit.
+
+    Returns:
+        int: The amount of frames to render, at least 1.
+    """
+    return max(1, min(frames, MAX_FRAMES, max_bytes // (width * height * BYTES_PER_PIXEL[fmt])))
+
+
+def encode_frame(image, fmt: str) -> bytes:
+    """Encode a single frame as a gif or png, to be added to a GifWriter or ApngWriter."""
+    return image_output.encode(image, "gif" if fmt == "gif" else "png")
+
+
+def fractal_frame(
+    seed: str, size: int, max_iterations: int, messiness: int, zoom: float, family: str, lookup_table: bool, fmt: str,
+    deadline: float
+) -> bytes:
+    """Worker task: render and encode one frame of a fractal zoom. Every frame uses the same seed and thus the same fractal."""
+    if time() > deadline:
+        raise RenderTimeout()
+    return encode_frame(
+        fractal.fractal(seed, size, size, max_iterations, messiness, zoom, family, deadline, lookup_table), fmt
+    )
+
+
+def spirograph_frame(seed: str, width: int, height: int, length: int, progress: float, fmt: str, deadline: float) -> bytes:
+    """Worker task: render and encode the spirograph drawn up to the given progress."""
+    if time() > deadline:
+        raise RenderTimeout()
+    return encode_frame(spirograph.spirograph(seed, width, height, length, progress, deadline), fmt)
+
+
+class GifWriter:
+    """Writes an endlessly looping gif one frame at a time, so only the encoded output is kept around.
+
+    Args:
+        output (BinaryIO): Where the gif is written to.
+        width (int): The width of every frame.
+        height (int): The height of every frame.
+        frames (int): The amount of frames that will be added.
+        delay (int): The time per frame in milliseconds.
+    """
+
+    def __init__(self, output: BinaryIO, width: int, height: int, frames: int, delay: int):
+        self.output = output
+        self.delay = delay
+        # Header and logical screen without a global colour table. Every frame brings its own colour table.
+        output.write(b"GIF89a" + struct.pack("<HHBBB", width, height, 0, 0, 0))
+        # Loop forever
+        output.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", 0) + b"\x00")
+
+    def add(self, frame: bytes):
+        """Add a frame encoded by encode_frame. Its global colour table becomes the local table of the frame."""
+        flags = frame[10]
+        table = frame[13:13 + (3 << ((flags & 0x07) + 1))] if flags & 0x80 else b""
+        position = 13 + len(table)
+        # Skip the extensions of the single frame gif
+        while frame[position] == 0x21:
+            position += 2
+            while frame[position]:
+                position += frame[position] + 1
+            position += 1
+        descriptor = frame[position:position + 10]
+        position += 10
+        image_flags = descriptor[9]
+        if image_flags & 0x80:
+            table_flags = image_flags
+            table = frame[position:position + (3 << ((image_flags & 0x07) + 1))]
+            position += len(table)
+        else:
+            table_flags = flags
+        # Graphic control extension with the frame delay, in hundredths of a second
+        self.output.write(b"\x21\xf9\x04\x04" + struct.pack("<H", round(self.delay / 10)) + b"\x00\x00")
+        self.output.write(descriptor[:9] + bytes([0x80 | (image_flags & 0x40) | (table_flags & 0x07)]) + table)
+        # LZW data up to, but not including, the trailer
+        self.output.write(frame[position:-1])
+
+    def close(self):
+        self.output.write(b"\x3b")
+
+
+class ApngWriter:
+    """Writes an endlessly looping animated png one frame at a time, so only the encoded output is kept around.
+    The image data of every png frame is moved into fdAT chunks. The first frame doubles as the still image.
+
+    Args:
+        output (BinaryIO): Where the png is written to.
+        width (int): The width of every frame.
+        height (int): The height of every frame.
+        frames (int): The amount of frames that will be added.
+        delay (int): The time per frame in milliseconds.
+    """
+
+    def __init__(self, output: BinaryIO, width: int, height: int, frames: int, delay: int):
+        self.output = output
+        self.width = width
+        self.height = height
+        self.frames = frames
+        self.delay = delay
+        self.sequence = 0
+        self.added = 0
+
+    def chunk(self, kind: bytes, data: bytes):
+        self.output.write(struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data)))
+
+    def next_sequence(self) -> bytes:
+        sequence = struct.pack(">I", self.sequence)
+        self.sequence += 1
+        return sequence
+
+    def add(self, frame: bytes):
+        """Add a frame encoded by encode_frame. All frames have to share the same size and colour type."""
+        chunks = []
+        position = len(PNG_SIGNATURE)
+        while position < len(frame):
+            (length,) = struct.unpack(">I", frame[position:position + 4])
+            chunks.append((frame[position + 4:position + 8], frame[position + 8:position + 8 + length]))
+            position += length + 12
+
+        if self.added == 0:
+            self.output.write(PNG_SIGNATURE)
+            self.chunk(b"IHDR", dict(chunks)[b"IHDR"])
+            # Frame count and loop forever
+            self.chunk(b"acTL", struct.pack(">II", self.frames, 0))
+        # Full size frame with the delay in milliseconds, no disposal and no blending
+        self.chunk(
+            b"fcTL",
+            self.next_sequence() + struct.pack(">IIIIHHBB", self.width, self.height, 0, 0, self.delay, 1000, 0, 0),
+        )
+        for kind, data in chunks:
+            if kind != b"IDAT":
+                continue
+            if self.added == 0:
+                self.chunk(b"IDAT", data)
+            else:
+                self.chunk(b"fdAT", self.next_sequence() + data)
+        self.added += 1
+
+    def close(self):
+        self.chunk(b"IEND", b"")
+
+
+WRITERS = {"gif": GifWriter, "apng": ApngWriter}
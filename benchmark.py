@@ -0,0 +1,417 @@
+"""Local benchmarks for Patrick's heavier commands. These run without discord.
+
+Usage:
+    python benchmark.py fractal [--size N] [--iterations N] [--legacy-size N] [--seeds ...]
+    python benchmark.py julia-search [--seeds N]
+    python benchmark.py spirograph [--width N] [--height N] [--length N] [--seeds ...]
+    python benchmark.py brainfuck [--programs ...] [--repeat N] [--no-memory]
+    python benchmark.py dispatch [--messages N] [--custom N] [--builtins N]
+    python benchmark.py autocomplete [--keys N] [--queries N]
+    python benchmark.py suggest [--names N] [--queries N]
+"""
+import argparse
+import asyncio
+import logging
+import tracemalloc
+from math import ceil, cos, sin
+from random import Random, choice
+from pathlib import Path
+from time import perf_counter
+from types import MappingProxyType, SimpleNamespace
+
+import numpy as np
+import yaml
+from discord.ext import commands
+
+import brainfuck
+import fractal
+import search
+import spirograph
+import suggest
+
+
+# Programs to measure the interpreter with. Some run far longer than ,bf allows: mandelbrot takes about 61M instructions,
+# over the default brainfuckDeets.maxInstructions of 20M. The benchmark deliberately runs past the bot's budget.
+BF_CORPUS = Path(__file__).parent / "bf_corpus"
+
+
+def load_deets(section: str) -> dict:
+    """Read a *Deets section from config.yaml, falling back to config.example.yaml."""
+    for name in ("config.yaml", "config.example.yaml"):
+        path = Path(__file__).parent / name
+        if path.exists():
+            with open(path, "r") as source:
+                return yaml.safe_load(source)[section]
+    raise FileNotFoundError("No config.yaml or config.example.yaml found")
+
+
+def legacy_fractal(seed, width, height, max_iterations, messiness, zoom):
+    """The original pixel by pixel renderer, kept as a reference for speed and output comparisons."""
+    aspect_ratio = float(width) / float(height)
+    (c_real, c_imag), (a, b, c) = fractal.fractal_params(seed, messiness)
+    seed_coordinate = fractal.Complex(c_real, c_imag)
+    img_array = np.array(
+        [[(0, 0, 0) for _ in range(height)] for _ in range(width)], dtype="uint8"
+    )
+    for y in range(height):
+        for x in range(int(ceil(float(width) / 2.0))):
+            co_x = aspect_ratio * zoom * (float(x) / float(width) - 0.5)
+            co_y = zoom * (float(y) / float(height) - 0.5)
+            coordinate = fractal.Complex(co_x, co_y)
+            iterations = fractal.julia_pixel(coordinate, max_iterations, seed_coordinate)
+            color = fractal.get_color(iterations, a, b, c)
+            img_array[y][x] = color
+            img_array[height - y - 1][width - x - 1] = color
+    return img_array
+
+
+def legacy_find_good_julia(angle, messiness):
+    """The original point by point julia search, kept as a reference."""
+    x = cos(angle) * 0.4 - 0.3
+    y = sin(angle) * 0.4
+    coord = fractal.Complex(x, y)
+    step = coord * 0.005
+    for _ in range(1000):
+        coord += step
+        if fractal.mandel_pixel(coord, messiness + 1) <= messiness:
+            return coord
+    return fractal.Complex(16.0, 0.0)
+
+
+def legacy_spirograph(seed, width, height, length):
+    """The original point by point spirograph, kept as a reference."""
+    rng = Random(spirograph.sha256_lower_long(seed))
+    line_color_start = (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255))
+    line_color_end = (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255))
+    colors = []
+    for i in range(100):
+        ratio = i / 99
+        colors.append(tuple(int(start * (1 - ratio) + end * ratio) for start, end in zip(line_color_start, line_color_end)))
+    img_array = np.array([[(0, 0, 0) for _ in range(height)] for _ in range(width)], dtype="uint8")
+    R = rng.randint(50, 150)
+    r = rng.randint(10, 50)
+    p = rng.randint(10, 50)
+    a = 0.0
+    points = []
+    while a < length:
+        points.append(((R - r) * cos(a) + p * cos(((R - r) / r) * a), (R - r) * sin(a) - p * sin(((R - r) / r) * a)))
+        a += 0.01
+    min_x = min(point[0] for point in points)
+    max_x = max(point[0] for point in points)
+    min_y = min(point[1] for point in points)
+    max_y = max(point[1] for point in points)
+    scale_x = (width - 20) / (max_x - min_x)
+    scale_y = (height - 20) / (max_y - min_y)
+    middle = (width // 2, height // 2)
+    scaled_points = []
+    for point in points:
+        x = int((point[0] - min_x) * scale_x) + 10
+        y = int((point[1] - min_y) * scale_y) + 10
+        distance = ((x - middle[0])**2 + (y - middle[1])**2)**0.5
+        if 2 <= x < width - 2 and 2 <= y < height - 2:
+            scaled_points.append((x, y, distance))
+    min_distance = min(point[2] for point in scaled_points)
+    max_distance = max(point[2] for point in scaled_points)
+    scale_distance = 99 / (max_distance - min_distance)
+    for x, y, distance in scaled_points:
+        img_array[x - 2:x + 2, y - 2:y + 2] = colors[ceil((distance - min_distance) * scale_distance) - 1]
+    return img_array
+
+
+async def legacy_process_commands(bot, message):
+    """Patrick.process_commands before the dispatcher: a full Context for every message, then a loop over the prefixes."""
+    ctx = await bot.get_context(message)
+    if ctx.command is None and ctx.prefix is not None:
+        custom_commands = bot.database.commands_cache
+        for prefix in bot.command_prefix:
+            if message.content.removeprefix(prefix) in custom_commands:
+                await message.channel.send(
+                    f"{message.author.display_name}: {choice(custom_commands[message.content.removeprefix(prefix)])}"
+                )
+                await bot.database.add_command_history(message.author.display_name, message.content.removeprefix(prefix))
+                return
+        return await message.channel.send(f"{message.author.display_name}: Unrecognized command :'(")
+    if ctx.valid:
+        await bot.database.add_command_history(message.author.display_name, ctx.command.name)
+        await bot.invoke(ctx)
+
+
+def timed(func, *args, **kwargs):
+    start = perf_counter()
+    result = func(*args, **kwargs)
+    return result, perf_counter() - start
+
+
+def bench_fractal(args):
+    deets = load_deets("fractalDeets")
+    size = args.size or deets["size"]
+    iterations = args.iterations or deets["maxIterations"]
+    messiness, zoom = deets["messiness"], deets["zoom"]
+
+    print(f"Fractal at {size}x{size}, {iterations} iterations")
+    for seed in args.seeds:
+        exact, took = timed(fractal.fractal, seed, size, size, iterations, messiness, zoom)
+        table, table_took = timed(fractal.fractal, seed, size, size, iterations, messiness, zoom, lookup_table=True)
+        differing = np.any(np.asarray(exact) != np.asarray(table), axis=2).sum()
+        print(
+            f"  {seed!r:>12}: {took:8.3f}s | lookup table {table_took:8.3f}s, "
+            f"{differing / (size * size):6.2%} of pixels a shade off"
+        )
+
+    legacy_size = args.legacy_size
+    print(f"Legacy comparison at {legacy_size}x{legacy_size}, {iterations} iterations")
+    for seed in args.seeds:
+        new, new_took = timed(fractal.fractal, seed, legacy_size, legacy_size, iterations, messiness, zoom)
+        old, old_took = timed(legacy_fractal, seed, legacy_size, legacy_size, iterations, messiness, zoom)
+        identical = np.array_equal(np.asarray(new), old)
+        print(
+            f"  {seed!r:>12}: legacy {old_took:8.3f}s | numpy {new_took:8.3f}s | "
+            f"speedup {old_took / new_took:6.1f}x | identical {identical}"
+        )
+
+
+def bench_julia_search(args):
+    messiness = load_deets("fractalDeets")["messiness"]
+    angles = [Random(fractal.sha256_lower_long(str(seed))).uniform(-3.14, 3.14) for seed in range(args.seeds)]
+
+    legacy, legacy_took = timed(lambda: [legacy_find_good_julia(angle, messiness) for angle in angles])
+    new, new_took = timed(lambda: [fractal.find_good_julia(angle, messiness) for angle in angles])
+    identical = all((old.real, old.imag) == (current.real, current.imag) for old, current in zip(legacy, new))
+    print(f"Julia search over {args.seeds} seeds, messiness {messiness}")
+    print(f"  legacy {legacy_took * 1000 / args.seeds:8.3f}ms per seed")
+    print(f"  numpy  {new_took * 1000 / args.seeds:8.3f}ms per seed")
+    print(f"  speedup {legacy_took / new_took:6.1f}x | identical {identical}")
+
+
+def bench_spirograph(args):
+    deets = load_deets("spirographDeets")
+    width = args.width or deets["width"]
+    height = args.height or deets["height"]
+    length = args.length or deets["length"]
+
+    print(f"Spirograph at {width}x{height}, length {length}")
+    for seed in args.seeds:
+        new, new_took = timed(spirograph.spirograph, seed, width, height, length)
+        old, old_took = timed(legacy_spirograph, seed, width, height, length)
+        identical = np.array_equal(np.asarray(new), old)
+        print(
+            f"  {seed!r:>12}: legacy {old_took:8.3f}s | numpy {new_took:8.3f}s | "
+            f"speedup {old_took / new_took:6.1f}x | identical {identical}"
+        )
+
+
+def bench_brainfuck(args):
+    names = args.programs or sorted(path.stem for path in BF_CORPUS.glob("*.b"))
+    budget = load_deets("brainfuckDeets")["maxInstructions"]
+    print(f"Brainfuck corpus, best of {args.repeat}. Programs marked * run past the {budget:,} instructions ,bf allows.")
+    for name in names:
+        code = (BF_CORPUS / f"{name}.b").read_text()
+        input_path = BF_CORPUS / f"{name}.in"
+        program_input = input_path.read_text() if input_path.exists() else ""
+        expected = (BF_CORPUS / f"{name}.out").read_text()
+
+        best = None
+        for _ in range(args.repeat):
+            result, took = timed(brainfuck.run_brainfuck, code, program_input, args.max_instructions)
+            best = took if best is None else min(best, took)
+        if result.error is not None:
+            status = result.error
+        else:
+            status = "ok" if result.output == expected else "wrong output"
+
+        memory = ""
+        if not args.no_memory:
+            # Separate run, tracing allocations slows the interpreter down a lot.
+            tracemalloc.start()
+            brainfuck.run_brainfuck(code, program_input, args.max_instructions)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            memory = f" | peak {peak / 1024:8.1f}KiB"
+        print(
+            f"  {name:>12}{'*' if result.instructions > budget else ' '}: {best:8.3f}s | {result.instructions:>11,} instructions | "
+            f"{result.instructions / best / 1e6:6.2f}M/s{memory} | {status}"
+        )
+
+
+def bench_dispatch(args):
+    # Imported here, the bot isn't needed by the other benchmarks.
+    import patrick
+
+    async def send(*_, **__):
+        pass
+
+    async def noop(ctx):
+        pass
+
+    async def run():
+        bot = patrick.Patrick(logging.getLogger("benchmark"), {})
+        # Stand-in for the logged in user, get_context compares message authors against it.
+        bot._connection.user = SimpleNamespace(id=0)
+        for i in range(args.builtins):
+            bot.add_command(commands.Command(noop, name=f"builtin{i}", aliases=[f"alias{i}"]))
+        bot.database.commands = MappingProxyType({f"custom{i}": ("response",) for i in range(args.custom)})
+        for key in bot.database.commands:
+            bot.database.suggestions.add(key)
+        author = SimpleNamespace(id=1, display_name="benchmark", bot=False, nick=None)
+        channel = SimpleNamespace(id=1, send=send)
+        kinds = {
+            "chatter": lambda i: f"just chatting about custom{i}",
+            "custom": lambda i: f",custom{i % args.custom}",
+            "builtin": lambda i: f", builtin{i % args.builtins} argument",
+            "unrecognized": lambda i: f",nothing{i}",
+        }
+        print(f"Dispatch of {args.messages} messages, {args.custom} custom and {args.builtins} builtin commands")
+        for kind, content in kinds.items():
+            messages = [
+                SimpleNamespace(
+                    content=content(i), author=author, channel=channel, guild=None, id=i, attachments=[],
+                    _state=bot._connection,
+                )
+                for i in range(args.messages)
+            ]
+            start = perf_counter()
+            for message in messages:
+                await bot.on_message(message)
+            new_took = perf_counter() - start
+            start = perf_counter()
+            for message in messages:
+                await legacy_process_commands(bot, message)
+            old_took = perf_counter() - start
+            bot.database.history.clear()
+            print(
+                f"  {kind:>12}: legacy {args.messages / old_took:10,.0f}/s | "
+                f"dispatcher {args.messages / new_took:10,.0f}/s | speedup {old_took / new_took:6.1f}x"
+            )
+
+    asyncio.run(run())
+
+
+def bench_autocomplete(args):
+    rng = Random(0)
+    syllables = ["re", "stone", "piston", "torch", "ore", "pat", "rick", "lag", "wire", "clock", "tick", "bud", "xor"]
+    keys = {"".join(rng.choice(syllables) for _ in range(rng.randint(1, 4))) + str(i): ("response",) for i in range(args.keys)}
+    uses = {key: int(rng.paretovariate(1.2)) for key in keys}
+    index = search.SearchIndex()
+    _, build_took = timed(index.load, keys, uses)
+    # What gets typed: every prefix of some keys and some syllables, like one request per keystroke
+    queries = [""]
+    for word in rng.sample(sorted(keys), args.queries // 8) + syllables:
+        queries.extend(word[:length] for length in range(1, len(word) + 1))
+
+    def legacy():
+        # The handlers before the index, without a ranking
+        return [[key for key in keys if query.lower() in key.lower()][:25] for query in queries]
+
+    def ranked():
+        return [index.search(query) for query in queries]
+
+    index.rank()
+    old, old_took = timed(legacy)
+    new, new_took = timed(ranked)
+    latencies = []
+    for query in queries:
+        start = perf_counter()
+        index.search(query)
+        latencies.append(perf_counter() - start)
+    latencies.sort()
+    same_matches = all(
+        len(found) == len(expected) and all(query.lower() in key.lower() for key in found)
+        for query, found, expected in zip(queries, new, old)
+    )
+    print(f"Autocomplete over {args.keys} keys, {len(queries)} queries, index built in {build_took * 1000:.1f}ms")
+    print(f"  legacy {old_took * 1e6 / len(queries):10.1f}us per query")
+    print(
+        f"  index  {new_took * 1e6 / len(queries):10.1f}us per query | "
+        f"p99 {latencies[len(latencies) * 99 // 100] * 1e6:.1f}us | max {latencies[-1] * 1e6:.1f}us"
+    )
+    print(f"  speedup {old_took / new_took:6.1f}x | same amount of matches {same_matches}")
+
+
+def bench_suggest(args):
+    rng = Random(0)
+    syllables = ["re", "stone", "piston", "torch", "ore", "pat", "rick", "lag", "wire", "clock", "tick", "bud", "xor"]
+    names = {"".join(rng.choice(syllables) for _ in range(rng.randint(1, 4))) for _ in range(args.names)}
+    index = suggest.SuggestionIndex()
+    _, build_took = timed(lambda: [index.add(name) for name in names])
+    # Names with one or two typos, and some that resemble nothing
+    queries = []
+    for name in rng.choices(sorted(names), k=args.queries):
+        for _ in range(rng.randint(1, 2)):
+            i = rng.randrange(len(name) + 1)
+            name = rng.choice([name[:i] + name[i + 1:], name[:i] + rng.choice("aeiourst") + name[i:]])
+        queries.append(name)
+    queries += ["".join(rng.choice("qwxyzjk") for _ in range(rng.randint(2, 10))) for _ in range(args.queries // 10)]
+
+    def legacy():
+        # A linear scan, comparing every name
+        found = []
+        for query in queries:
+            distances = ((suggest.edit_distance(query.lower(), name.lower()), name) for name in names)
+            matches = sorted(match for match in distances if match[0] <= suggest.MAX_DISTANCE)
+            found.append([name for _, name in matches[:suggest.SUGGESTIONS]])
+        return found
+
+    def indexed():
+        return [index.suggest(query) for query in queries]
+
+    old, old_took = timed(legacy)
+    new, new_took = timed(indexed)
+    print(f"Suggestions over {len(names)} names, {len(queries)} queries, index built in {build_took * 1000:.1f}ms")
+    print(f"  linear scan {old_took * 1e6 / len(queries):10.1f}us per query")
+    print(f"  index       {new_took * 1e6 / len(queries):10.1f}us per query")
+    print(f"  speedup {old_took / new_took:6.1f}x | same suggestions {old == new}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for Patrick's heavier commands.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    fractal_parser = subparsers.add_parser("fractal", help="Time the julia renderer against the legacy renderer.")
+    fractal_parser.add_argument("--size", type=int, help="Image size. Defaults to fractalDeets.size.")
+    fractal_parser.add_argument("--iterations", type=int, help="Defaults to fractalDeets.maxIterations.")
+    fractal_parser.add_argument("--legacy-size", type=int, default=256, help="Image size for the legacy comparison.")
+    fractal_parser.add_argument("--seeds", nargs="+", default=["patrick", "ore", "redstone"])
+    fractal_parser.set_defaults(func=bench_fractal)
+
+    search_parser = subparsers.add_parser("julia-search", help="Time find_good_julia against the legacy search.")
+    search_parser.add_argument("--seeds", type=int, default=500, help="Amount of seeds to search.")
+    search_parser.set_defaults(func=bench_julia_search)
+
+    spirograph_parser = subparsers.add_parser("spirograph", help="Time the spirograph against the legacy renderer.")
+    spirograph_parser.add_argument("--width", type=int, help="Defaults to spirographDeets.width.")
+    spirograph_parser.add_argument("--height", type=int, help="Defaults to spirographDeets.height.")
+    spirograph_parser.add_argument("--length", type=float, help="Defaults to spirographDeets.length.")
+    spirograph_parser.add_argument("--seeds", nargs="+", default=["patrick", "ore", "redstone"])
+    spirograph_parser.set_defaults(func=bench_spirograph)
+
+    brainfuck_parser = subparsers.add_parser("brainfuck", help="Time the brainfuck interpreter on bf_corpus.")
+    brainfuck_parser.add_argument("--programs", nargs="+", help="Names of the corpus programs. Defaults to all of them.")
+    brainfuck_parser.add_argument("--repeat", type=int, default=3, help="Runs per program, the fastest one counts.")
+    brainfuck_parser.add_argument(
+        "--max-instructions", type=int, default=10**9, help="Deliberately above brainfuckDeets.maxInstructions."
+    )
+    brainfuck_parser.add_argument("--no-memory", action="store_true", help="Skip the run that measures peak memory.")
+    brainfuck_parser.set_defaults(func=bench_brainfuck)
+
+    dispatch_parser = subparsers.add_parser("dispatch", help="Messages per second through Patrick.on_message.")
+    dispatch_parser.add_argument("--messages", type=int, default=20000, help="Messages per kind of message.")
+    dispatch_parser.add_argument("--custom", type=int, default=1000, help="Amount of custom commands.")
+    dispatch_parser.add_argument("--builtins", type=int, default=60, help="Amount of builtin commands.")
+    dispatch_parser.set_defaults(func=bench_dispatch)
+
+    autocomplete_parser = subparsers.add_parser("autocomplete", help="Time the custom command autocomplete index.")
+    autocomplete_parser.add_argument("--keys", type=int, default=30000, help="Amount of custom commands.")
+    autocomplete_parser.add_argument("--queries", type=int, default=2000, help="Rough amount of queries.")
+    autocomplete_parser.set_defaults(func=bench_autocomplete)
+
+    suggest_parser = subparsers.add_parser("suggest", help="Time the did you mean suggestions against a linear scan.")
+    suggest_parser.add_argument("--names", type=int, default=1000, help="Amount of command names.")
+    suggest_parser.add_argument("--queries", type=int, default=2000, help="Amount of mistyped names.")
+    suggest_parser.set_defaults(func=bench_suggest)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
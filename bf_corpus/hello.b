@@ -0,0 +1,4 @@
+Hello World
+
+++++++++[>++++[>++>+++>+++>+<<<<-]>+>+>->>+[<]<-]>>.>---.+++++++..+++.>>.<-
+.<.+++.------.--------.>>+.>++.
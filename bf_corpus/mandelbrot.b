@@ -0,0 +1,215 @@
+Renders the Mandelbrot set as ASCII art in 40 by 17 characters
+using sign and magnitude fixed point numbers in sixteenths and at most 16 iterations
+
+>>>>[-]+>[-]++++++++++++++++<<<<<[-]+++++++++++++++++[->>[-]+>[-
+]++++++++++++++++++++++++++++++++<<[-]++++++++++++++++++++++++++++++++++++++++[-
+>>>>>[-]>[-]>[-]>[-]>[-]>[-]+[>>>>>>>>>>[-]<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>+>>>+<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>]<<[-]++++++++++++++++++++++++++++++++>[-]<[-
+>>[-]+>[-]<<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<[<[-]>[-]]<[<[-]+<<+>>>[-]]<<<-
+>]<[-][-]<<<<<<<<<<<<[->>>>>>>>>>>>+>>>>+<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>]<<<[-]++++++++++++++++++++++++++++++++>>[-
+]<<[->>>[-]+>[-]<<<<<[->>>>>+>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<[<[-]>[-]]<[<[-
+]+<<<+>>>>[-]]<<<<->]<[-][-]>>[>[-<<<+>>>]<[-]]>[-]<<[-]+>[-]<<[->>+>+<<<]>>>[-
+<<<+>>>]<[<[-]>[-]]<[<<<<<<<<<<<[-]>>>>>>>>>>>[-]]<[<<<<<<<<<[-]>>>>>>>>>>>[-
+]<<<<<<<<<<<<<<<<[->>>>>>>>>>>>>>>>+>>+<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>]<[-]++++++++<[->>[-]<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>>>>>+>+<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>]<[-<->>[-]+>[-]<<<[->>>+>+<<<<]>>>>[-
+<<<<+>>>>]<[<[-]>[-]]<[<<<<<<<<<<<<<<+>>>>>>>>>>>>[-]++++++++++++++++>>[-
+]]<]<<]>[-]<<<<<<<<<<<[-]>>>>>>>>>>[-]<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>+>>+<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>]<[-]++++++++<[->>[-]<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>>>+>+<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>]<[-<->>[-]+>[-]<<<[->>>+>+<<<<]>>>>[-
+<<<<+>>>>]<[<[-]>[-]]<[<<<<<<<<<<<<<+>>>>>>>>>>>[-]++++++++++++++++>>[-
+]]<]<<]>[-]<[-]<<<<<<<<<<<[->>>>>>>>>>>+>+<<<<<<<<<<<<]>>>>>>>>>>>>[-
+<<<<<<<<<<<<+>>>>>>>>>>>>]<<<<<<<<<<<[->>>>>>>>>>+>+<<<<<<<<<<<]>>>>>>>>>>>[-
+<<<<<<<<<<<+>>>>>>>>>>>][-]<[->+>>>+<<<<]>>>>[-<<<<+>>>>]<<[-
+]+++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++>[-]<[->>[-
+]+>[-]<<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<[<[-]>[-]]<[<[-]+<<+>>>[-]]<<<-
+>]<[-]<[-][-]+>[-]>>[-<<+>+>]<[->+<]<[<[-]>[-]]<[<<<<<<<<<<<<[-]>>>>>>>>>>>>[-
+]]>>>[<<<<<<<<<<<<[-]>>>>>>>>>>[-]<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>>>>+>>>+<<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>>]<<[-]++++<[->>>[-]<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>>>>>+>+<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>]<[-<<->>>[-]+>[-]<<<<[-
+>>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<[<[-]>[-]]<[<<<<<<<<<<<<<<+>>>>>>>>>>>[-
+]++++++++>>>[-]]<]<<<]>[-]<<<<<<<<<<[-]>>>>>>>>>[-]<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>>>>>+>+<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>]<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>>>+>+<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>]<->[-]+>>[-]<<<[->>>+>+<<<<]>>>>[-
+<<<<+>>>>]<[<<[-]>>[-]]<<<[-]>[-<<<<<<<<<<+>>>>>>>>>>]<<<<<[-]+>>>>>>>[-]>[-]<[-
+>+>+<<]>>[-<<+>>]<<<<<<<<<[->>>>>>>>+>+<<<<<<<<<]>>>>>>>>>[-
+<<<<<<<<<+>>>>>>>>>]<->[-]<[->+>+<<]>>[-<<+>>][-]+>[-]<<<[->>>+>+<<<<]>>>>[-
+<<<<+>>>>]<[<[-]>[-]]<<<[-]<<<<[-]>[-]>>>>[<<[-<<<+>>>>+<]>[-
+<+>]<<<<<<<<<<<<<<<<[->>>>>>>>>>>>>+>>>+<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>]<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>+>>>+<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>]>[-]]>[<<[-]>>>[-]>[-]<<<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>>>+>>>>>+<<<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>>>]<<<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>>>>>+>>+<<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>>]<<[->>[-]+>[-]<<<<<<[-
+>>>>>>+>+<<<<<<<]>>>>>>>[-<<<<<<<+>>>>>>>]<[<[-]>[-]][-]+>[-]<<[->>+>+<<<]>>>[-
+<<<+>>>]<[<[-]>[-]]<<[<+>[-]]>[<<<<<<->>>>>>[-]]<<<]>>[-]+>[-]<<[->>+>+<<<]>>>[-
+<<<+>>>]<[<[-]>[-]][-]<<[->>+>+<<<]>>>[-<<<+>>>]<[<<<<<<<<<<<<<<[-
+>>>>+>>>>>>>>>>>+<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>]<<<[-<<<<<<<+>>>>>>>]>>[-]]<[<<<<<<[-
+<<<+>>>>>>>>>>+<<<<<<<]>>>>>>>[-<<<<<<<+>>>>>>>]<<<<<<[-<<<+>>>]>>>>>[-]]<<<<<[-
+]>>[-]]<<[-]+>[-]<<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<[<[-]>[-]]<[<<<<[-
+]>>>>[-]][-]<<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<<<<<<<<<<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>>>>>>>>>>>>>+>+<<<<<<<<<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>>>>>
+>>>>[-<<<<<<<<<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>>>>>>>>>]<->[-]<[-
+>+>+<<]>>[-<<+>>][-]+>[-]<<<[->>>+>+<<<<]>>>>[-<<<<+>>>>]<[<[-]>[-]]<<<[-
+]<<<<<<<<<<<<[-]>[-]>>>>>>>>>>>>[<<<<<[-<<<<<<<<+>>>>>>>>>>>>+<<<<]>>>>[-
+<<<<+>>>>]<<<[-<<<<<<<<+>>>>>>>>>>>+<<<]>>>[-<<<+>>>]<<<<<<<<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>+>>>>>>>>>>>+<<<<<<<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>>>>>>>]>[-]]>[<<[-]>>>[-]>[-
+]<<<<<<<[->>>+>>>>>+<<<<<<<<]>>>>>>>>[-
+<<<<<<<<+>>>>>>>>]<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>>>>>>>>>>>>>>>+>>+<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>
+>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>]<<[->>[-]+>[-
+]<<<<<<[->>>>>>+>+<<<<<<<]>>>>>>>[-<<<<<<<+>>>>>>>]<[<[-]>[-]][-]+>[-]<<[-
+>>+>+<<<]>>>[-<<<+>>>]<[<[-]>[-]]<<[<+>[-]]>[<<<<<<->>>>>>[-]]<<<]>>[-]+>[-]<<[-
+>>+>+<<<]>>>[-<<<+>>>]<[<[-]>[-]][-]<<[->>+>+<<<]>>>[-
+<<<+>>>]<[<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>+>>>>>>>>>>>>>>>>>>>+<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>
+>>>>>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>]<<<[-
+<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>]>>[-]]<[<<<<<<<<<[-
+<<<<<<<<+>>>>>>>>>>>>>>>>>>+<<<<<<<<<<]>>>>>>>>>>[-
+<<<<<<<<<<+>>>>>>>>>>]<<<<<<[-<<<<<<<<<<<+>>>>>>>>>>>]>>>>>[-]]<<<<<[-]>>[-
+]]<<[-]+>[-]<<<<<<<<<<<<[->>>>>>>>>>>>+>+<<<<<<<<<<<<<]>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<+>>>>>>>>>>>>>]<[<[-]>[-]]<[<<<<<<<<<<<<[-]>>>>>>>>>>>>[-]]<<<<[-
+]>[-]<[-]<<<<<<<<<[->>>>>>>>>+>+<<<<<<<<<<]>>>>>>>>>>[-
+<<<<<<<<<<+>>>>>>>>>>]<<<<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>>>>>>>+>+<<<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>>>]<->[-]<[->+>>+<<<]>>>[-<<<+>>>][-
+]+>[-]<<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<[<[-]>[-]]<<<<[-]<<<<<<[-]>[-
+]>>>>>>[<<<<<<<<<<[->>>+>>>>>>+<<<<<<<<<]>>>>>>>>>[-
+<<<<<<<<<+>>>>>>>>>]<<<<<<<<<<[->>>>>+>>>>>+<<<<<<<<<<]>>>>>>>>>>[-
+<<<<<<<<<<+>>>>>>>>>>]<<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>+>>>>>+<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>]>[-]]>>[<<<[-]>>>>[-]>[-
+]<<<<<<<<<<<<<<<[->>>>>>>>>>+>>>>>>+<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>]<<<<<<<<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>>>>>>>>>>+>>+<<<<<<<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>>>>>>>]<<[->>[-]+>[-]<<<<<<<[-
+>>>>>>>+>+<<<<<<<<]>>>>>>>>[-<<<<<<<<+>>>>>>>>]<[<[-]>[-]][-]+>[-]<<[-
+>>+>+<<<]>>>[-<<<+>>>]<[<[-]>[-]]<<[<+>[-]]>[<<<<<<<->>>>>>>[-]]<<<]>>[-]+>[-
+]<<[->>+>+<<<]>>>[-<<<+>>>]<[<[-]>[-]][-]<<[->>+>+<<<]>>>[-
+<<<+>>>]<[<<<<<<<<<<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>+>>>>>>>>>>>>>>+<<<<<<<<<<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>>>
+>>>>>>>[-<<<<<<<<<<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>>>>>>>>>>]<<<[-
+<<<<<<<<<<+>>>>>>>>>>]>>[-]]<[<<<<<<<<<<<<<<<[-
+>>>+>>>>>>>>>>>>>+<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>]<<<<<<<[-<<<<<+>>>>>]>>>>>>[-]]<<<<<<[-]>>>[-
+]]<<<[-]+>[-]<<<<<<[->>>>>>+>>+<<<<<<<<]>>>>>>>>[-<<<<<<<<+>>>>>>>>]<<[<[-]>[-
+]]<[<<<<<<[-]>>>>>>[-]]<<<<<<<<<<<<<<<<<<[-]>[-]>[-]>[-]>>>>>>>[-
+<<<<<<<<<<+>>>>>>>>>>]>[-<<<<<<<<<<+>>>>>>>>>>]>[-<<<<<<<<<<+>>>>>>>>>>]>[-
+<<<<<<<<<<+>>>>>>>>>>]<<<<<<<[-]>[-]>[-]>[-]>>>>>[-]<<<<<<<<<<+>>>>>>>>>>>>>>[-
+]<<<<<<<<<<<<<<[->>>>>>>>>>>>>>+>>>>+<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>]<<<[-]++++++++++++++++>>[-]<<[->>>[-]+>[-
+]<<<<<[->>>>>+>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<[<[-]>[-]]<[<[-]+<<<+>>>>[-]]<<<<-
+>]<[-][-]+>[-]>>[-<<+>>>+<]>[-<+>]<<<[<[-]>[-]]>>[-]<<<[<<<<<<<<<<<<<[-
+]>>>>>>>>>>>>>[-]]>>[-]]<<<<<[-]]<<<<<<<<<<]>>>>>>>>>>[-]<<<<<<<<<<<[-
+>>>>>>>>>>>+>>>>+<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>]<<<[-]+>>>[-]+>[-]<<<<<[->>>>>+>+<<<<<<]>>>>>>[-
+<<<<<<+>>>>>>]<[<[-]>[-]][-]<[<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<<[-]]>[<<<[-
+]++++++++++++++++++++++++++++++++.[-]<[-]>>>>[-]]<<<<<->>>>[-]+>[-]<<<<<[-
+>>>>>+>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<[<[-]>[-]][-]<[<<<[->>>>+>+<<<<<]>>>>>[-
+<<<<<+>>>>>]<<[-]]>[<<<[-]++++++++++++++++++++++++++++++++++++++++++++++.[-]<[-
+]>>>>[-]]<<<<<->>>>[-]+>[-]<<<<<[->>>>>+>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<[<[-]>[-
+]][-]<[<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<<[-]]>[<<<[-
+]++++++++++++++++++++++++++++++++++++++++++++.[-]<[-]>>>>[-]]<<<<<->>>>[-]+>[-
+]<<<<<[->>>>>+>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<[<[-]>[-]][-]<[<<<[-
+>>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<<[-]]>[<<<[-
+]+++++++++++++++++++++++++++++++++++++++++++++.[-]<[-]>>>>[-]]<<<<<->>>>[-]+>[-
+]<<<<<[->>>>>+>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<[<[-]>[-]][-]<[<<<[-
+>>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<<[-]]>[<<<[-
+]+++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
++++++++++++++++++++++++++++++++++++++++++++++++.[-]<[-]>>>>[-]]<<<<<->>>>[-]+>[-
+]<<<<<[->>>>>+>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<[<[-]>[-]][-]<[<<<[-
+>>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<<[-]]>[<<<[-
+]++++++++++++++++++++++++++++++++++++++++++++++++++++++++++.[-]<[-]>>>>[-
+]]<<<<<->>>>[-]+>[-]<<<<<[->>>>>+>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<[<[-]>[-]][-
+]<[<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<<[-]]>[<<<[-
+]+++++++++++++++++++++++++++++++++++++++++++++++++++++++++++.[-]<[-]>>>>[-
+]]<<<<<->>>>[-]+>[-]<<<<<[->>>>>+>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<[<[-]>[-]][-
+]<[<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<<[-]]>[<<<[-
+]+++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++.[-]<[-]>>>>[-
+]]<<<<<->>>>[-]+>[-]<<<<<[->>>>>+>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<[<[-]>[-]][-
+]<[<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<<[-]]>[<<<[-
+]+++++++++++++++++++++++++++++++++.[-]<[-]>>>>[-]]<<<<<->>>>[-]+>[-]<<<<<[-
+>>>>>+>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<[<[-]>[-]][-]<[<<<[->>>>+>+<<<<<]>>>>>[-
+<<<<<+>>>>>]<<[-]]>[<<<[-]++++++++++++++++++++++++++++++++++++++++++.[-]<[-
+]>>>>[-]]<<<<<->>>>[-]+>[-]<<<<<[->>>>>+>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<[<[-]>[-
+]][-]<[<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<<[-]]>[<<<[-
+]+++++++++++++++++++++++++++++++++++.[-]<[-]>>>>[-]]<<<<<->>>>[-]+>[-]<<<<<[-
+>>>>>+>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<[<[-]>[-]][-]<[<<<[->>>>+>+<<<<<]>>>>>[-
+<<<<<+>>>>>]<<[-]]>[<<<[-]++++++++++++++++++++++++++++++++++++.[-]<[-]>>>>[-
+]]<<<<<->>>>[-]+>[-]<<<<<[->>>>>+>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<[<[-]>[-]][-
+]<[<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<<[-]]>[<<<[-
+]+++++++++++++++++++++++++++++++++++++.[-]<[-]>>>>[-]]<<<<<->>>>[-]+>[-]<<<<<[-
+>>>>>+>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<[<[-]>[-]][-]<[<<<[->>>>+>+<<<<<]>>>>>[-
+<<<<<+>>>>>]<<[-]]>[<<<[-]++++++++++++++++++++++++++++++++++++++.[-]<[-]>>>>[-
+]]<<<<<->>>>[-]+>[-]<<<<<[->>>>>+>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<[<[-]>[-]][-
+]<[<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<<[-]]>[<<<[-
+]++++++++++++++++++++++++++++++++++++++.[-]<[-]>>>>[-]]<<<<<->>>>[-]+>[-]<<<<<[-
+>>>>>+>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<[<[-]>[-]][-]<[<<<[->>>>+>+<<<<<]>>>>>[-
+<<<<<+>>>>>]<<[-]]>[<<<[-]++++++++++++++++++++++++++++++++++++++.[-]<[-]>>>>[-
+]]<<<<<->>>>[-]+>[-]<<<<<[->>>>>+>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<[<[-]>[-]][-
+]<[<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<<[-]]>[<<<[-
+]++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++.[-]<[-]>>>>[-
+]]<<<<<-[-]>[-]<<[-]+>[-]>[-]<<<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>>>>>>>+>+<<<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>>>]<<[->+>+<<]>>[-<<+>>]<->[-]<[-
+>+>>+<<<]>>>[-<<<+>>>][-]+>[-]<<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<[<[-]>[-
+]]<<<<[-]<<<<<<[-]>[-]>>>>>>[<<<<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>+>>>>>>+<<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>>]<<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>+>>>>>+<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>]<<[-<<<+>>>>>+<<]>>[-<<+>>]>[-]]>>[<<<[-
+]>>>>[-]>[-]<<<<<<<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>>>>>>+>>>>>>+<<<<<<<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>>>>>>>]<<<<<<<<[-
+>>>>>>+>>+<<<<<<<<]>>>>>>>>[-<<<<<<<<+>>>>>>>>]<<[->>[-]+>[-]<<<<<<<[-
+>>>>>>>+>+<<<<<<<<]>>>>>>>>[-<<<<<<<<+>>>>>>>>]<[<[-]>[-]][-]+>[-]<<[-
+>>+>+<<<]>>>[-<<<+>>>]<[<[-]>[-]]<<[<+>[-]]>[<<<<<<<->>>>>>>[-]]<<<]>>[-]+>[-
+]<<[->>+>+<<<]>>>[-<<<+>>>]<[<[-]>[-]][-]<<[->>+>+<<<]>>>[-<<<+>>>]<[<<<<<<<<[-
+<<<<<+>>>>>>>>>>>>>>+<<<<<<<<<]>>>>>>>>>[-<<<<<<<<<+>>>>>>>>>]<<<[-
+<<<<<<<<<<+>>>>>>>>>>]>>[-]]<[<<<<<<<<<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>+>>>>>>>>>>>>>+<<<<<<<<<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>>>>>
+>>>>[-<<<<<<<<<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>>>>>>>>>]<<<<<<<[-
+<<<<<+>>>>>]>>>>>>[-]]<<<<<<[-]>>>[-]]<<<[-]+>[-]<<<<<<[-
+>>>>>>+>>+<<<<<<<<]>>>>>>>>[-<<<<<<<<+>>>>>>>>]<<[<[-]>[-]]<[<<<<<<[-]>>>>>>[-
+]]<<<<<<<<<<<<<<<<<<<<[-]>[-]>>>>>>>>>>>>>>>>>[-]<<<<[-
+<<<<<<<<<<<<<<+>>>>>>>>>>>>>>]>[-
+<<<<<<<<<<<<<<+>>>>>>>>>>>>>>]<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>>[-
+]++++++++++.[-]<[-]++>[-]>[-]<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>>>>>+>+<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>]<<[->+>+<<]>>[-<<+>>]<->[-]<[-
+>+>>+<<<]>>>[-<<<+>>>][-]+>[-]<<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<[<[-]>[-
+]]<<<<[-]<<<<[-]>[-]>>>>[<<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>+>>>>+<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>]<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>+>>>+<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>]<<[-<+>>>+<<]>>[-<<+>>]>[-]]>>[<<<[-]>>>>[-
+]>[-]<<<<<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>>>>+>>>>>>+<<<<<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>>>>>]<<<<<<<<[-
+>>>>>>+>>+<<<<<<<<]>>>>>>>>[-<<<<<<<<+>>>>>>>>]<<[->>[-]+>[-]<<<<<<<[-
+>>>>>>>+>+<<<<<<<<]>>>>>>>>[-<<<<<<<<+>>>>>>>>]<[<[-]>[-]][-]+>[-]<<[-
+>>+>+<<<]>>>[-<<<+>>>]<[<[-]>[-]]<<[<+>[-]]>[<<<<<<<->>>>>>>[-]]<<<]>>[-]+>[-
+]<<[->>+>+<<<]>>>[-<<<+>>>]<[<[-]>[-]][-]<<[->>+>+<<<]>>>[-<<<+>>>]<[<<<<<<<<[-
+<<<+>>>>>>>>>>>>+<<<<<<<<<]>>>>>>>>>[-<<<<<<<<<+>>>>>>>>>]<<<[-
+<<<<<<<<+>>>>>>>>]>>[-]]<[<<<<<<<<<<<<<<<<<<<<<<<<[-
+>>>>>>>>>>>>>>+>>>>>>>>>>>+<<<<<<<<<<<<<<<<<<<<<<<<<]>>>>>>>>>>>>>>>>>>>>>>>>>[-
+<<<<<<<<<<<<<<<<<<<<<<<<<+>>>>>>>>>>>>>>>>>>>>>>>>>]<<<<<<<[-<<<+>>>]>>>>>>[-
+]]<<<<<<[-]>>>[-]]<<<[-]+>[-]<<<<[->>>>+>>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<<[<[-
+]>[-]]<[<<<<[-]>>>>[-]]<<<<<<<<<<<<<<<<<<[-]>[-]>>>>>>>>>>>>>>>[-]<<[-
+<<<<<<<<<<<<<<+>>>>>>>>>>>>>>]>[-
+<<<<<<<<<<<<<<+>>>>>>>>>>>>>>]<<<<<<<<<<<<<<<<<<<]
@@ -0,0 +1,33 @@
+Applies rot13 to one line of input and stops at the newline
+
+>[-]+[<,>>>[-]<<<[->>>+>+<<<<]>>>>[-<<<<+>>>>]<---------->[-]+>[-]<<[-
+>>+>+<<<]>>>[-<<<+>>>]<[<[-]>[-]]<<[-][-]+>>[-]<[->+>+<<]>>[-<<+>>]<[<<[-]>>[-
+]]<[<<<[-]>>>[-]]<[>>[-]<<<<<[->>>>>+>>>+<<<<<<<<]>>>>>>>>[-
+<<<<<<<<+>>>>>>>>]<<[-
+]+++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+++++++++++++++++++>[-]<[->>[-]+>[-]<<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<[<[-
+]>[-]]<[<[-]+<<+>>>[-]]<<<->]<[-][-]<<<<<[->>>>>+>>>>+<<<<<<<<<]>>>>>>>>>[-
+<<<<<<<<<+>>>>>>>>>]<<<[-
+]+++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+++++++++++++++++++++++++++++++++++++++++++++>>[-]<<[->>>[-]+>[-]<<<<<[-
+>>>>>+>+<<<<<<]>>>>>>[-<<<<<<+>>>>>>]<[<[-]>[-]]<[<[-]+<<<+>>>>[-]]<<<<->]<[-][-
+]>[-]+>>>[-]<<[->>+>+<<<]>>>[-<<<+>>>]<[<<<[-]>>>[-]]<<<[>>[-<<<+>>>]<<[-]]>>[-
+]<[-]<<[>[-]<<<<<<[->>>>>>+>>>+<<<<<<<<<]>>>>>>>>>[-<<<<<<<<<+>>>>>>>>>]<<[-
+]+++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
++++++++++++++++++++++++++++++++>[-]<[->>[-]+>[-]<<<<[->>>>+>+<<<<<]>>>>>[-
+<<<<<+>>>>>]<[<[-]>[-]]<[<[-]+<<+>>>[-]]<<<->]<[-][-]+>[-]>[-<+>>+<]>[-
+<+>]<<[<[-]>[-]]>[<<<<<<<<+++++++++++++>>>>>>>>[-]]<<[<<<<<<-------------
+>>>>>>[-]]<[-]][-]<<<<<[->>>>>+>>>+<<<<<<<<]>>>>>>>>[-<<<<<<<<+>>>>>>>>]<<[-
+]+++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++>[-]<[->>[-
+]+>[-]<<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<[<[-]>[-]]<[<[-]+<<+>>>[-]]<<<-
+>]<[-][-]<<<<<[->>>>>+>>>>+<<<<<<<<<]>>>>>>>>>[-<<<<<<<<<+>>>>>>>>>]<<<[-
+]+++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+++++++++++++>>[-]<<[->>>[-]+>[-]<<<<<[->>>>>+>+<<<<<<]>>>>>>[-
+<<<<<<+>>>>>>]<[<[-]>[-]]<[<[-]+<<<+>>>>[-]]<<<<->]<[-][-]>[-]+>>>[-]<<[-
+>>+>+<<<]>>>[-<<<+>>>]<[<<<[-]>>>[-]]<<<[>>[-<<<+>>>]<<[-]]>>[-]<[-]<<[>[-
+]<<<<<<[->>>>>>+>>>+<<<<<<<<<]>>>>>>>>>[-<<<<<<<<<+>>>>>>>>>]<<[-
+]++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++>
+[-]<[->>[-]+>[-]<<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<[<[-]>[-]]<[<[-]+<<+>>>[-
+]]<<<->]<[-][-]+>[-]>[-<+>>+<]>[-<+>]<<[<[-]>[-
+]]>[<<<<<<<<+++++++++++++>>>>>>>>[-]]<<[<<<<<<------------->>>>>>[-]]<[-]]<<[-
+]]<<<.[-]>]
@@ -0,0 +1,31 @@
+Prints the squares of 0 to 100 in decimal with one per line
+
+>>>>>[-
+]+++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+++++++++++++++++++++++>[-]+<[->>>>[-]>[-]<<<<<<[->>>>>>+>+<<<<<<<]>>>>>>>[-
+<<<<<<<+>>>>>>>]<<[->+>+<<]>>[-<<+>>]<[<<[-]<<<<[->>>>+>>>+<<<<<<<]>>>>>>>[-
+<<<<<<<+>>>>>>>]<<<++++++++++++++++++++++++++++++++++++++++++++++++.[-]>[-]+>[-
+]][-]<<<<<<<[->>>>>>>+>+<<<<<<<<]>>>>>>>>[-<<<<<<<<+>>>>>>>>]<<[->+>+<<]>>[-
+<<+>>]<[<<[-]<<<<<[->>>>>+>>>+<<<<<<<<]>>>>>>>>[-
+<<<<<<<<+>>>>>>>>]<<<++++++++++++++++++++++++++++++++++++++++++++++++.[-]>[-
+]+>[-]][-]<<<<<<<<[->>>>>>>>+>+<<<<<<<<<]>>>>>>>>>[-<<<<<<<<<+>>>>>>>>>]<<[-
+>+>+<<]>>[-<<+>>]<[<<[-]<<<<<<[->>>>>>+>>>+<<<<<<<<<]>>>>>>>>>[-
+<<<<<<<<<+>>>>>>>>>]<<<++++++++++++++++++++++++++++++++++++++++++++++++.[-]>[-
+]+>[-]][-]<<<<<<<<<[->>>>>>>>>+>+<<<<<<<<<<]>>>>>>>>>>[-
+<<<<<<<<<<+>>>>>>>>>>]<<[->+>+<<]>>[-<<+>>]<[<<[-]<<<<<<<[-
+>>>>>>>+>>>+<<<<<<<<<<]>>>>>>>>>>[-
+<<<<<<<<<<+>>>>>>>>>>]<<<++++++++++++++++++++++++++++++++++++++++++++++++.[-]>[-
+]+>[-]]<<[-]<<<<<<<<[->>>>>>>>+>>+<<<<<<<<<<]>>>>>>>>>>[-
+<<<<<<<<<<+>>>>>>>>>>]<<++++++++++++++++++++++++++++++++++++++++++++++++.[-
+]++++++++++.[-]<[-]<[->+>>>+<<<<]>>>>[-<<<<+>>>>]<<<[-<<<<<<<+>>>>>>>>>>[-
+]<<<<<<<<<<[->>>>>>>>>>+>+<<<<<<<<<<<]>>>>>>>>>>>[-<<<<<<<<<<<+>>>>>>>>>>>]<----
+------>[-]+>[-]<<[->>+>+<<<]>>>[-<<<+>>>]<[<[-]>[-]]<<[-]>[<<<<<<<<<<<[-
+]>+>>>>>>>>>[-]<<<<<<<<<[->>>>>>>>>+>>+<<<<<<<<<<<]>>>>>>>>>>>[-
+<<<<<<<<<<<+>>>>>>>>>>>]<<---------->>[-]+>[-]<<<[->>>+>+<<<<]>>>>[-
+<<<<+>>>>]<[<[-]>[-]]<<<[-]>>[<<<<<<<<<<<[-]>+>>>>>>>>[-]<<<<<<<<[-
+>>>>>>>>+>>>+<<<<<<<<<<<]>>>>>>>>>>>[-<<<<<<<<<<<+>>>>>>>>>>>]<<<---------->>>[-
+]+>[-]<<<<[->>>>+>+<<<<<]>>>>>[-<<<<<+>>>>>]<[<[-]>[-]]<<<<[-]>>>[<<<<<<<<<<<[-
+]>+>>>>>>>[-]<<<<<<<[->>>>>>>+>>>>+<<<<<<<<<<<]>>>>>>>>>>>[-
+<<<<<<<<<<<+>>>>>>>>>>>]<<<<---------->>>>[-]+>[-]<<<<<[->>>>>+>+<<<<<<]>>>>>>[-
+<<<<<<+>>>>>>]<[<[-]>[-]]<<<<<[-]>>>>[<<<<<<<<<<<[-]>+>>>>>>>>>>[-]]<[-]]<[-
+]]<[-]]<<<<]<++<]
@@ -1,15 +1,26 @@
+import threading
 from collections import deque
+from typing import NamedTuple, Optional
+
+CELLS = 30000
+# Instructions a program may run when no budget is given
+DEFAULT_MAX_INSTRUCTIONS = 10_000_000
+# Instructions between checks of the budget and the cancel event
+CHECK_INTERVAL = 10_000
+
+# Opcodes. Every instruction is an (opcode, argument, position) tuple, the position being the character in the source.
+ADD = 0  # Add the argument to the current cell
+RIGHT = 1  # Move the pointer right by the argument, a run of '>'
+LEFT = 2  # Move the pointer left by the argument, a run of '<'
+OUTPUT = 3
+INPUT = 4
+OPEN = 5  # Jump past the matching CLOSE, whose index is the argument, when the current cell is zero
+CLOSE = 6  # Jump back behind the matching OPEN, whose index is the argument, unless the current cell is zero
+MOVE = 7  # A loop that only adds to cells around the current one, see compile_loop
+SCAN = 8  # A loop like [>] or [<<] that moves until it finds a zero cell. The argument is the signed step
+
+COMMANDS = "+-<>.,[]"
 
-class Memory:
-    def __init__(self, input):
-        self.counter = 0
-        self.pointer = 0
-        self.cells = [0] * 30000
-        self.input = input
-        self.input_index = 0
-        self.output = ""
-        self.loops_counter = 0
-        self.brace_map = {}
 
 def create_brace_map(code: str):
     brace_map = {}
@@ -29,48 +40,276 @@ def create_brace_map(code: str):
         raise SyntaxError(stack.pop())
     return brace_map
 
-def process_brainfuck(code: str, input: str):
-    memory = Memory(input)
+
+def compile_loop(code: str, start: int, end: int):
+    """Try to compile a loop into a single SCAN or MOVE instruction.
+    Loops like [>] that only move the pointer become a SCAN.
+    MOVE works for loops like [-] and [->+>++<<] that only use +-<>, end where they started and change the starting cell
+    by exactly one. Such a loop runs a known amount of times and adds a multiple of that to the other cells.
+
+    Args:
+        code (str): The source.
+        start (int): The position of the '['.
+        end (int): The position of the matching ']'.
+
+    Returns:
+        tuple: The SCAN or MOVE instruction, or None if the loop doesn't qualify.
+    """
+    body = compile_body(code, start + 1, end)
+    if body is None:
+        return None
+    if len(body) == 1 and body[0][0] != ADD:
+        op, arg, position = body[0]
+        return SCAN, (arg if op == RIGHT else -arg, position), start
+    offset = 0
+    lowest = highest = 0
+    deltas = {}
+    for op, arg, _ in body:
+        if op == ADD:
+            deltas[offset] = deltas.get(offset, 0) + arg
+        elif op == RIGHT:
+            offset += arg
+            highest = max(highest, offset)
+        else:
+            offset -= arg
+            lowest = min(lowest, offset)
+    if offset != 0 or deltas.get(0, 0) not in (1, -1):
+        return None
+    step = deltas.pop(0)
+    # (offsets and the amount added per pass, step of the starting cell, lowest and highest offset, the body for errors)
+    return MOVE, (tuple(deltas.items()), step, lowest, highest, tuple(body)), start
+
+
+def compile_body(code: str, start: int, end: int):
+    """Compile a stretch of code that only contains +-<> and comments.
+
+    Returns:
+        list: The instructions, or None if the code contains other commands.
+    """
+    body = []
+    position = start
+    while position < end:
+        char = code[position]
+        if char in "+-":
+            run_start = position
+            delta = 0
+            while position < end and code[position] not in "<>.,[]":
+                if code[position] == "+":
+                    delta += 1
+                elif code[position] == "-":
+                    delta -= 1
+                position += 1
+            body.append((ADD, delta, run_start))
+        elif char in "<>":
+            run_start = position
+            while position < end and code[position] == char:
+                position += 1
+            body.append((RIGHT if char == ">" else LEFT, position - run_start, run_start))
+        elif char in COMMANDS:
+            return None
+        else:
+            position += 1
+    return body
+
+
+def compile_brainfuck(code: str) -> list:
+    """Compile brainfuck into a list of instructions.
+    Runs of +- are folded into a single ADD, runs of the same <> into a single RIGHT or LEFT,
+    and loops that only move values around or search for a zero cell into a single MOVE or SCAN.
+    Jump targets are resolved up front.
+
+    Args:
+        code (str): The source.
+
+    Raises:
+        SyntaxError: When the brackets don't match, like create_brace_map.
+
+    Returns:
+        list: The instructions.
+    """
+    brace_map = create_brace_map(code)
+    program = []
+    opened = []
+    position = 0
+    while position < len(code):
+        char = code[position]
+        if char == "[":
+            move = compile_loop(code, position, brace_map[position])
+            if move is not None:
+                program.append(move)
+                position = brace_map[position] + 1
+                continue
+            opened.append(len(program))
+            program.append(None)  # Filled in at the matching ']'
+            position += 1
+        elif char == "]":
+            open_index = opened.pop()
+            program[open_index] = (OPEN, len(program), brace_map[position])
+            # The position of the '[', which is where loop errors are reported.
+            program.append((CLOSE, open_index, brace_map[position]))
+            position += 1
+        elif char in "+-<>":
+            end = position
+            while end < len(code) and code[end] not in ".,[]":
+                end += 1
+            program.extend(compile_body(code, position, end))
+            position = end
+        elif char == ".":
+            program.append((OUTPUT, 0, position))
+            position += 1
+        elif char == ",":
+            program.append((INPUT, 0, position))
+            position += 1
+        else:
+            position += 1
+    return program
+
+
+class BrainfuckResult(NamedTuple):
+    """The outcome of a brainfuck program. The output is empty when it failed."""
+    output: str
+    error: Optional[str]
+    instructions: int
+
+
+class BrainfuckVM:
+    """Runs compiled brainfuck on a tape of 30000 byte cells. Input characters are stored modulo 256.
+    The VM counts the instructions it executes and stops once the budget is used up.
+    Setting the cancel event stops it as well, so a thread running it can be ended from the event loop.
+
+    Args:
+        program (list): The instructions from compile_brainfuck.
+        input (str): The characters read by ','.
+        max_instructions (int): The instruction budget.
+        cancel (threading.Event): Stops the program when set.
+    """
+
+    def __init__(
+        self, program: list, input: str, max_instructions: int = DEFAULT_MAX_INSTRUCTIONS, cancel: threading.Event = None
+    ):
+        self.program = program
+        self.input = input
+        self.max_instructions = max_instructions
+        self.cancel = cancel or threading.Event()
+        self.cells = bytearray(CELLS)
+        self.output = bytearray()
+
+    def run(self) -> BrainfuckResult:
+        program = self.program
+        cells = self.cells
+        output = self.output
+        input = self.input
+        cancel = self.cancel
+        pointer = 0
+        input_index = 0
+        counter = 0
+        end = len(program)
+        remaining = self.max_instructions
+        # Instructions left until the next check of the budget and the cancel event
+        fuel = 0
+
+        def fail(error: str) -> BrainfuckResult:
+            return BrainfuckResult("", error, self.max_instructions - remaining - fuel)
+
+        while counter < end:
+            if fuel == 0:
+                if cancel.is_set():
+                    return fail(f"error: cancelled at character {program[counter][2]}")
+                if remaining == 0:
+                    return fail(
+                        f"error: instruction limit of {self.max_instructions} exceeded at character {program[counter][2]}"
+                    )
+                fuel = min(CHECK_INTERVAL, remaining)
+                remaining -= fuel
+            fuel -= 1
+            op, arg, position = program[counter]
+            if op == ADD:
+                cells[pointer] = (cells[pointer] + arg) & 255
+            elif op == RIGHT:
+                if pointer + arg > CELLS - 1:
+                    return fail(f"error: pointer moved above {CELLS - 1} at character {position + CELLS - 1 - pointer}")
+                pointer += arg
+            elif op == LEFT:
+                if pointer - arg < 0:
+                    return fail(f"error: pointer moved below 0 at character {position + pointer}")
+                pointer -= arg
+            elif op == CLOSE:
+                if cells[pointer] != 0:
+                    counter = arg
+            elif op == OPEN:
+                if cells[pointer] == 0:
+                    counter = arg
+            elif op == MOVE:
+                value = cells[pointer]
+                if value != 0:
+                    targets, step, lowest, highest, body = arg
+                    if pointer + lowest < 0 or pointer + highest > CELLS - 1:
+                        return fail(self.move_error(body, pointer))
+                    # The amount of passes until the starting cell reaches zero
+                    passes = value if step == -1 else 256 - value
+                    for offset, delta in targets:
+                        cells[pointer + offset] = (cells[pointer + offset] + delta * passes) & 255
+                    cells[pointer] = 0
+            elif op == SCAN:
+                step, step_position = arg
+                if cells[pointer] != 0:
+                    # Look at every step'th cell in the direction of the scan
+                    found = cells[pointer::step].find(0)
+                    if found == -1:
+                        last = pointer + step * ((CELLS - 1 - pointer) // step if step > 0 else pointer // -step)
+                        if step > 0:
+                            return fail(
+                                f"error: pointer moved above {CELLS - 1} at character {step_position + CELLS - 1 - last}"
+                            )
+                        return fail(f"error: pointer moved below 0 at character {step_position + last}")
+                    pointer += step * found
+            elif op == OUTPUT:
+                output.append(cells[pointer])
+            else:
+                if input_index < len(input):
+                    cells[pointer] = ord(input[input_index]) & 255
+                    input_index += 1
+                else:
+                    return fail(f"error: input exhausted at character {position}")
+            counter += 1
+        return BrainfuckResult(output.decode("latin-1"), None, self.max_instructions - remaining - fuel)
+
+    @staticmethod
+    def move_error(body: tuple, pointer: int) -> str:
+        """Find the character at which the first pass of a MOVE loop moves the pointer off the tape."""
+        for op, arg, position in body:
+            if op == RIGHT:
+                if pointer + arg > CELLS - 1:
+                    return f"error: pointer moved above {CELLS - 1} at character {position + CELLS - 1 - pointer}"
+                pointer += arg
+            elif op == LEFT:
+                if pointer - arg < 0:
+                    return f"error: pointer moved below 0 at character {position + pointer}"
+                pointer -= arg
+
+
+def run_brainfuck(
+    code: str, input: str, max_instructions: int = DEFAULT_MAX_INSTRUCTIONS, cancel: threading.Event = None
+) -> BrainfuckResult:
+    """Compile and run brainfuck code.
+
+    Args:
+        code (str): The source.
+        input (str): The characters read by ','.
+        max_instructions (int): The instruction budget.
+        cancel (threading.Event): Stops the program when set.
+
+    Returns:
+        BrainfuckResult: The output or the error, and the amount of instructions executed.
+    """
     try:
-        memory.brace_map = create_brace_map(code)
+        program = compile_brainfuck(code)
     except SyntaxError as e:
-        return f"error: unmatched '[' at character {e.args[0]}"
-    memory.counter = 0
-    while memory.counter < len(code):
-        match code[memory.counter]:
-            case ">":
-                if memory.pointer < 29999:
-                    memory.pointer += 1
-                else:
-                    return f"error: pointer moved above 29999 at character {memory.counter}"
-            case "<":
-                if memory.pointer > 0:
-                    memory.pointer -= 1
-                else:
-                    return f"error: pointer moved below 0 at character {memory.counter}"
-            case "+":
-                memory.cells[memory.pointer] = (memory.cells[memory.pointer] + 1) % 256
-            case "-":
-                memory.cells[memory.pointer] = (memory.cells[memory.pointer] - 1) % 256
-            case ".":
-                memory.output += chr(memory.cells[memory.pointer])
-            case ",":
-                if memory.input_index < len(memory.input):
-                    memory.cells[memory.pointer] = ord(memory.input[memory.input_index])
-                    memory.input_index += 1
-                else:
-                    return f"error: input exhausted at character {memory.counter}"
-            case "[":
-                if memory.cells[memory.pointer] == 0:
-                    memory.counter = memory.brace_map[memory.counter]
-            case "]":
-                if memory.cells[memory.pointer] != 0:
-                    memory.counter = memory.brace_map[memory.counter]
-                    memory.loops_counter += 1
-                    if memory.loops_counter > 1000:
-                        return f"error: infinite loop detected at character {memory.counter}"
-                else:
-                    memory.loops_counter = 0
+        return BrainfuckResult("", f"error: unmatched '[' at character {e.args[0]}", 0)
+    return BrainfuckVM(program, input, max_instructions, cancel).run()
+
 
-        memory.counter += 1
-    return memory.output
\ No newline at end of file
+def process_brainfuck(code: str, input: str, max_instructions: int = DEFAULT_MAX_INSTRUCTIONS):
+    """Run brainfuck code and return its output, or the error message if it failed."""
+    result = run_brainfuck(code, input, max_instructions)
+    return result.output if result.error is None else result.error
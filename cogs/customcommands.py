@@ -2,7 +2,7 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 
-from util import app_is_staff, return_or_truncate, get_all_command_names
+from util import app_is_staff, return_or_truncate
 
 
 class ConfirmView(discord.ui.View):
@@ -48,8 +48,7 @@ class CustomCommands(commands.Cog):
     @app_commands.command(description="Add a custom command to the bot.")
     @app_is_staff()
     async def add(self, interaction, key: str, *, message: str):
-        commands_ = get_all_command_names(self.bot)
-        if key in commands_:
+        if self.bot.registry.is_reserved(key):
             # The command is already a coded/built-in command. Don't allow adding it.
             await interaction.response.send_message(
                 f"Command `{key}` is already a built-in command. Please choose a different name.",
@@ -86,10 +85,9 @@ class CustomCommands(commands.Cog):
 
     @add_response.autocomplete("key")
     async def autocomplete_key(self, interaction, current: str):
-        commands_ = self.bot.database.commands_cache
         return [
             app_commands.Choice(name=key, value=key)
-            for key in [k for k in commands_ if current.lower() in k.lower()][:25]
+            for key in self.bot.database.search.search(current)
         ]
 
 
@@ -116,10 +114,9 @@ class CustomCommands(commands.Cog):
 
     @remove.autocomplete("key")
     async def autocomplete_remove_key(self, interaction, current: str):
-        commands_ = self.bot.database.commands_cache
         return [
             app_commands.Choice(name=key, value=key)
-            for key in [k for k in commands_ if current.lower() in k.lower()][:25]
+            for key in self.bot.database.search.search(current)
         ]
 
     @app_commands.command(
@@ -155,22 +152,17 @@ class CustomCommands(commands.Cog):
 
     @remove_response.autocomplete("key")
     async def autocomplete_remove_response_key(self, interaction, current: str):
-        commands_ = self.bot.database.commands_cache
         return [
             app_commands.Choice(name=key, value=key)
-            for key in [k for k in commands_ if current.lower() in k.lower()][:25]
+            for key in self.bot.database.search.search(current)
         ]
 
     @remove_response.autocomplete("message")
     async def autocomplete_message(self, interaction, current: str):
         key = interaction.namespace.key
-        if key not in self.bot.database.commands_cache:
-            return []
-        messages = self.bot.database.commands_cache[key]
         return [
             app_commands.Choice(name=message, value=message)
-            for message in messages
-            if current.lower() in message.lower()
+            for message in self.bot.database.search.search_responses(key, current)
         ]
 
 
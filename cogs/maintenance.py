@@ -0,0 +1,44 @@
+import datetime
+
+import discord
+from discord.ext import commands, tasks
+
+from util import is_staff, reply
+
+
+class Maintenance(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        hour = self.bot.config.get("databaseDeets", {}).get("maintenanceHour", 4)
+        self.database_maintenance.change_interval(time=datetime.time(hour=hour, tzinfo=datetime.timezone.utc))
+        self.database_maintenance.start()
+
+    async def cog_unload(self):
+        self.database_maintenance.cancel()
+
+    @tasks.loop(time=datetime.time(hour=4, tzinfo=datetime.timezone.utc))
+    async def database_maintenance(self):
+        """Optimize, vacuum and checkpoint the database once a day at an off-peak hour."""
+        timings = await self.bot.database.run_maintenance()
+        self.bot.logger.info(f"Database maintenance took {sum(timings.values()):.2f} seconds")
+        if self.bot.database.readers is not None:
+            self.bot.logger.info(f"Database read pool: {self.bot.database.readers.stats()}")
+
+    @commands.command(help="Show how long database reads wait for a connection.")
+    @is_staff()
+    async def dbstats(self, ctx):
+        readers = self.bot.database.readers
+        if readers is None:
+            return await reply(ctx, "There is no read pool, reads go through the writer.")
+        stats = readers.stats()
+        embed = discord.Embed(title="Database read pool", color=discord.Color.blue())
+        embed.add_field(name="Connections", value=f"{stats['idle']} of {stats['size']} idle")
+        embed.add_field(name="Reads", value=f"{stats['acquired']}, {stats['waited']} had to wait")
+        embed.add_field(
+            name="Wait", value=f"{stats['average wait']:.1f} ms average, {stats['longest wait']:.1f} ms longest"
+        )
+        await reply(ctx, embed=embed)
+
+
+async def setup(bot):
+    await bot.add_cog(Maintenance(bot))
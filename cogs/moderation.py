@@ -1,15 +1,23 @@
+import asyncio
 import discord
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 import typing
 
+from scheduler import DeadlineScheduler
 from util import is_staff, app_is_staff, create_deletion_embed, reformat_relay_chat
 from timeutil import UserFriendlyTime
 
+# Unban requests running at the same time
+UNBAN_CONCURRENCY = 4
+# Unbanned users listed per audit log embed. 100 mentions stay well below the 4096 characters of an embed description.
+UNBANS_PER_EMBED = 100
+
 class Moderation(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.check_tempbans.start()
+        self.tempbans = DeadlineScheduler("tempban", self.expire_tempbans)
+        self.unbans = asyncio.Semaphore(UNBAN_CONCURRENCY)
         # Discord.py doesn't support using the @app_commands.context_menu decorator in Cogs.
         # This is the recommended workaround.
         # See: https://github.com/Rapptz/discord.py/issues/7823#issuecomment-1086830458
@@ -19,28 +27,54 @@ class Moderation(commands.Cog):
         )
         self.bot.tree.add_command(ctx_menu)
 
-    @tasks.loop(seconds=60)
-    async def check_tempbans(self):
-        tempbans = await self.bot.database.pop_expired_tempbans()
-        if not tempbans:
-            return
+    async def cog_load(self):
+        # Bans that expired while the bot was offline are lifted right away.
+        for rowid, due in await self.bot.database.get_pending_tempbans():
+            self.tempbans.schedule(rowid, due)
+        self.tempbans.start()
+
+    async def cog_unload(self):
+        self.tempbans.stop()
+
+    async def expire_tempbans(self, rowids):
+        """Lift the temporary bans that are due, called by the scheduler. Users are unbanned by ID, without fetching them,
+        and listed together in as few audit log embeds as possible.
+        """
+        tempbans = await self.bot.database.pop_tempbans(rowids)
         channel = self.bot.get_channel(self.bot.config["channels"]["audit_log"])
-        for user_id, in tempbans:
-            user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
-            if user:
+        # Bans from before the guild was stored are in the guild of the audit log channel
+        default_guild = channel.guild if channel else None
+        unbanned = []
+
+        async def unban(guild_id, user_id):
+            guild = self.bot.get_guild(guild_id) if guild_id else default_guild
+            if guild is None:
+                return
+            async with self.unbans:
                 try:
-                    await self.bot.guild.unban(user, reason=f"Temporary ban expired")
+                    await guild.unban(discord.Object(user_id), reason="Temporary ban expired")
                 except discord.NotFound:
                     # User is not banned, skip
-                    continue
-                embed = discord.Embed(
-                    title="ORE Moderation Services",
-                    description=f"{user.mention} has been unbanned after their temporary ban expired.",
-                    color=discord.Color.green(),
-                )
-                embed.set_thumbnail(url="https://i.imgflip.com/44o9ir.png")
-                embed.timestamp = discord.utils.utcnow()
-                await channel.send(embed=embed)
+                    return
+                except discord.HTTPException as e:
+                    self.bot.logger.warning(f"Failed to lift the temporary ban of {user_id}: {e}")
+                    return
+            unbanned.append(user_id)
+
+        await asyncio.gather(*(unban(guild_id, user_id) for guild_id, user_id in tempbans))
+        if channel is None:
+            return
+        for start in range(0, len(unbanned), UNBANS_PER_EMBED):
+            users = unbanned[start:start + UNBANS_PER_EMBED]
+            embed = discord.Embed(
+                title="ORE Moderation Services",
+                description=f"{', '.join(f'<@{user_id}>' for user_id in users)} "
+                f"{'has' if len(users) == 1 else 'have'} been unbanned after their temporary ban expired.",
+                color=discord.Color.green(),
+            )
+            embed.set_thumbnail(url="https://i.imgflip.com/44o9ir.png")
+            embed.timestamp = discord.utils.utcnow()
+            await channel.send(embed=embed)
 
     class DeleteModal(discord.ui.Modal, title="Reason for deleting"):
         reason = discord.ui.TextInput(
@@ -84,11 +118,13 @@ class Moderation(commands.Cog):
     async def tempban(self, ctx, user: typing.Union[discord.Member, discord.User], *, time: UserFriendlyTime):
         reason = time.arg
         channel = ctx.guild.get_channel(self.bot.config["channels"]["audit_log"])
-        await self.bot.database.add_tempban(
+        rowid = await self.bot.database.add_tempban(
             user_id=user.id,
             reason=reason,
             timestamp=time.dt,
+            guild_id=ctx.guild.id,
         )
+        self.tempbans.schedule(rowid, time.dt)
         await ctx.guild.ban(user, reason=f"Temporary ban by {ctx.author}: {reason or 'No reason provided'}")
         embed = discord.Embed(
             title="ORE Moderation Services",
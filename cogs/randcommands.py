@@ -1,6 +1,8 @@
 import asyncio
 import random
-from asyncio import to_thread
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 from io import BytesIO
 from random import choice, getrandbits, randint
 from time import perf_counter
@@ -8,17 +10,36 @@ from time import perf_counter
 import discord
 from discord.ext import commands
 
-from fractal import fractal
-from spirograph import spirograph
-from brainfuck import process_brainfuck
+import animation
+from fractal import KERNELS, RenderTimeout
+from image_output import DEFAULT_MAX_BYTES, ImageTooLarge
+from renderer import PREVIEW
+from brainfuck import DEFAULT_MAX_INSTRUCTIONS, run_brainfuck
+from scheduler import DeadlineScheduler
 from util import is_staff, baseconvert, reply
 
+# How long slap and pikl hand out their role for
+SLAP_DURATION = timedelta(hours=1)
+PIKL_DURATION = timedelta(minutes=2)
+# Members whose expired roles are removed at the same time
+ROLE_REMOVAL_CONCURRENCY = 4
+
 
 class RandCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.role_expirations = DeadlineScheduler("role expiration", self.expire_roles)
+        self.role_removals = asyncio.Semaphore(ROLE_REMOVAL_CONCURRENCY)
+
+    async def cog_unload(self):
+        self.role_expirations.stop()
 
     async def cog_load(self):
+        # Roles that expired while the bot was offline are removed right away.
+        for rowid, due in await self.bot.database.get_pending_role_expirations():
+            self.role_expirations.schedule(rowid, due)
+        self.role_expirations.start()
+
         bases = {
         "b": 2,
         "o": 8,
@@ -178,9 +199,8 @@ class RandCommands(commands.Cog):
         if slap_role in user.roles:
             return await reply(ctx, "User is already slapped.")
         await user.add_roles(slap_role)
+        await self.expire_role(user, slap_role, SLAP_DURATION)
         await reply(ctx, f"slapped {user.mention}", False, True)
-        await asyncio.sleep(3_600)  # 1 hour
-        await user.remove_roles(slap_role)
 
     @commands.command(help="Unslap someone. Staff only.")
     @commands.guild_only()
@@ -192,6 +212,7 @@ class RandCommands(commands.Cog):
         if slap_role not in user.roles:
             return await reply(ctx, "User is not slapped.")
         await user.remove_roles(slap_role)
+        await self.forget_role_expiration(user, slap_role)
         await reply(ctx, f"unslapped {user.mention}")
 
     @commands.command(help="pikl someone.")
@@ -202,9 +223,43 @@ class RandCommands(commands.Cog):
         if pikl_role is None:
             return await reply(ctx, "No pikl role :(")
         await user.add_roles(pikl_role)
+        await self.expire_role(user, pikl_role, PIKL_DURATION)
         await reply(ctx, f"{user.mention} got pikl'd.", False, True)
-        await asyncio.sleep(120)
-        await user.remove_roles(pikl_role)
+
+    async def expire_role(self, member: discord.Member, role: discord.Role, duration: timedelta):
+        """Take a role away from a member once the duration has passed. Replaces an earlier expiration of the same role.
+        The expiration is stored in the database, so it survives restarts.
+        """
+        await self.forget_role_expiration(member, role)
+        expires = datetime.now(timezone.utc) + duration
+        rowid = await self.bot.database.add_role_expiration(member.guild.id, member.id, role.id, expires)
+        self.role_expirations.schedule(rowid, expires)
+
+    async def forget_role_expiration(self, member: discord.Member, role: discord.Role):
+        for rowid in await self.bot.database.remove_role_expirations(member.guild.id, member.id, role.id):
+            self.role_expirations.cancel(rowid)
+
+    async def expire_roles(self, rowids):
+        """Remove the roles that are due, called by the scheduler.
+        All roles of a member that are due together are removed in one request.
+        """
+        roles = defaultdict(list)
+        for guild_id, user_id, role_id in await self.bot.database.pop_role_expirations(rowids):
+            roles[guild_id, user_id].append(discord.Object(role_id))
+
+        async def remove(guild_id, user_id, member_roles):
+            guild = self.bot.get_guild(guild_id)
+            # Members that left lost their roles already
+            member = guild and guild.get_member(user_id)
+            if member is None:
+                return
+            async with self.role_removals:
+                try:
+                    await member.remove_roles(*member_roles, reason="Role expired")
+                except discord.HTTPException as e:
+                    self.bot.logger.warning(f"Failed to remove expired roles from {member}: {e}")
+
+        await asyncio.gather(*(remove(guild_id, user_id, member_roles) for (guild_id, user_id), member_roles in roles.items()))
 
     @commands.command(help="Googles something.", aliases=["lmgtfy"])
     async def google(self, ctx, *, query):
@@ -267,55 +322,149 @@ class RandCommands(commands.Cog):
             else:
                 await reply(ctx, "An error occurred while fetching the aeiou text.")
 
-    @commands.command(help="Generate a fractal image using a given seed.")
+    def render_timings(self, result) -> str:
+        if result.render_seconds is None:
+            return "cached"
+        return f"render {result.render_seconds:.2f}s, encode {result.encode_seconds:.2f}s"
+
+    def image_attachment(self, name: str, result) -> tuple:
+        """Create a file and an embed showing it for a rendered image."""
+        filename = f"{name}.{result.extension}"
+        file = discord.File(fp=BytesIO(result.data), filename=filename)
+        embed = discord.Embed()
+        embed.set_image(url=f"attachment://{filename}")
+        return file, embed
+
+    async def send_animation(self, ctx, name: str, seed: str, render):
+        """Render an animation with the given coroutine function and send it, or explain why it failed."""
+        start = perf_counter()
+        try:
+            result = await render()
+        except RenderTimeout:
+            return await reply(ctx, f"{name.capitalize()} animation took too long, terminating.")
+        except ImageTooLarge:
+            return await reply(ctx, f"{name.capitalize()} animation is too large to upload.")
+
+        file, embed = self.image_attachment(name, result)
+        await reply(ctx, seed, file=file, embed=embed)
+
+        end = perf_counter()
+        self.bot.logger.info(
+            f"{name.capitalize()} animation took {end - start:.2f} seconds ({self.render_timings(result)}) for seed '{seed}'"
+        )
+
+    def animation_settings(self, size: int) -> tuple:
+        """Get the format, capped frame count, delay and timeout for an animation with square frames of the given size."""
+        deets = self.bot.config.get("animationDeets", {})
+        fmt = deets.get("format", "gif")
+        # The same output settings the renderer encodes with, empty when renderDeets is missing
+        max_bytes = self.bot.renderer.output.get("maxUploadBytes", DEFAULT_MAX_BYTES)
+        frames = animation.frame_limit(deets.get("frames", 40), size, size, fmt, max_bytes)
+        return fmt, frames, deets.get("delay", 80), deets.get("timeout", 30)
+
+    @commands.command(
+        help=f"Generate a fractal image using a given seed. Families: {', '.join(KERNELS)}. "
+             f"Set animated to true for a zoom into the fractal."
+    )
     @is_staff()
-    async def fractal(self, ctx, seed: str):
+    async def fractal(self, ctx, seed: str, family: str = "julia", animated: bool = False):
+        if family not in KERNELS:
+            return await reply(ctx, f"Unknown fractal family. Choose one of: {', '.join(KERNELS)}.")
+        if animated:
+            deets = self.bot.config.get("animationDeets", {})
+            size = min(deets.get("fractalSize", 384), animation.MAX_SIZE)
+            fmt, frames, delay, timeout = self.animation_settings(size)
+            return await self.send_animation(
+                ctx, "fractal", seed,
+                lambda: self.bot.renderer.fractal_animation(
+                    seed, size, deets.get("fractalIterations", 1000), self.bot.config["fractalDeets"]["messiness"],
+                    self.bot.config["fractalDeets"]["zoom"], deets.get("zoomFactor", 0.95), family, frames, fmt, delay, timeout
+                ),
+            )
         start = perf_counter()
         size = self.bot.config["fractalDeets"]["size"]
         max_iter = self.bot.config["fractalDeets"]["maxIterations"]
         messiness = self.bot.config["fractalDeets"]["messiness"]
         zoom = self.bot.config["fractalDeets"]["zoom"]
-        try:
-            frac = await asyncio.wait_for(
-                to_thread(fractal, seed, size, size, max_iter, messiness, zoom),
-                timeout=15.0
+        preview_size = self.bot.config["fractalDeets"].get("previewSize", 256)
+        preview_iter = self.bot.config["fractalDeets"].get("previewIterations", 200)
+        deadline = start + 15.0
+
+        frac = await self.bot.renderer.cached_fractal(seed, size, max_iter, messiness, zoom, family)
+        message = None
+        if frac is None:
+            # Start the full render right away, so the time spent on the preview doesn't come out of its budget.
+            full = asyncio.ensure_future(
+                self.bot.renderer.fractal_image(seed, size, max_iter, messiness, zoom, family, timeout=deadline - perf_counter())
             )
-        except asyncio.TimeoutError:
-            return await reply(ctx, "Fractal generation took too long, terminating.")
-
-        with BytesIO() as image_binary:
-            frac.save(image_binary, "PNG")
-            image_binary.seek(0)
-            file = discord.File(fp=image_binary, filename="image.png")
-            embed = discord.Embed()
-            embed.set_image(url="attachment://image.png")
+            # Post a small render first and replace it when the full one is done. Its tasks go ahead of the full
+            # render's in the queue. The preview uses the same seed, so it shows the same fractal in the same colours.
+            try:
+                preview = await self.bot.renderer.fractal_image(
+                    seed, preview_size, preview_iter, messiness, zoom, family, timeout=deadline - perf_counter(),
+                    priority=PREVIEW,
+                )
+                if not full.done():
+                    file, embed = self.image_attachment("image", preview)
+                    message = await reply(ctx, f"{seed} (preview, rendering full image...)", file=file, embed=embed)
+            except (RenderTimeout, ImageTooLarge):
+                pass
+            except BaseException:
+                full.cancel()
+                raise
+
+            try:
+                frac = await full
+            except (RenderTimeout, ImageTooLarge) as error:
+                if isinstance(error, RenderTimeout):
+                    text = "Fractal generation took too long, terminating."
+                else:
+                    text = "Fractal is too large to upload."
+                if message is None:
+                    return await reply(ctx, text)
+                return await message.edit(content=f"{ctx.author.display_name}: {seed} (preview only. {text})")
+
+        file, embed = self.image_attachment("image", frac)
+        if message is None:
             await reply(ctx, seed, file=file, embed=embed)
+        else:
+            await message.edit(content=f"{ctx.author.display_name}: {seed}", attachments=[file], embed=embed)
 
         end = perf_counter()
         self.bot.logger.info(
-            f"Fractal generation took {end - start:.2f} seconds for seed '{seed}'"
+            f"Fractal generation took {end - start:.2f} seconds ({self.render_timings(frac)}) for {family} seed '{seed}'"
         )
 
-    @commands.command(help="Generate a spirograph image using a given seed.")
-    async def spirograph(self, ctx, seed: str):
+    @commands.command(help="Generate a spirograph image using a given seed. Set animated to true to watch it being drawn.")
+    async def spirograph(self, ctx, seed: str, animated: bool = False):
+        if animated:
+            deets = self.bot.config.get("animationDeets", {})
+            size = min(deets.get("spirographSize", 512), animation.MAX_SIZE)
+            fmt, frames, delay, timeout = self.animation_settings(size)
+            return await self.send_animation(
+                ctx, "spirograph", seed,
+                lambda: self.bot.renderer.spirograph_animation(
+                    seed, size, size, self.bot.config["spirographDeets"]["length"], frames, fmt, delay, timeout
+                ),
+            )
         start = perf_counter()
         width = self.bot.config["spirographDeets"]["width"]
         height = self.bot.config["spirographDeets"]["height"]
         length = self.bot.config["spirographDeets"]["length"]
 
-        img = await to_thread(spirograph, seed, width, height, length)
+        try:
+            img = await self.bot.renderer.spirograph_image(seed, width, height, length, timeout=15.0)
+        except RenderTimeout:
+            return await reply(ctx, "Spirograph generation took too long, terminating.")
+        except ImageTooLarge:
+            return await reply(ctx, "Spirograph is too large to upload.")
 
-        with BytesIO() as image_binary:
-            img.save(image_binary, "PNG")
-            image_binary.seek(0)
-            file = discord.File(fp=image_binary, filename="spirograph.png")
-            embed = discord.Embed()
-            embed.set_image(url="attachment://spirograph.png")
-            await reply(ctx, seed, file=file,  embed=embed)
+        file, embed = self.image_attachment("spirograph", img)
+        await reply(ctx, seed, file=file, embed=embed)
 
         end = perf_counter()
         self.bot.logger.info(
-            f"Spirograph generation took {end - start:.2f} seconds for seed '{seed}'"
+            f"Spirograph generation took {end - start:.2f} seconds ({self.render_timings(img)}) for seed '{seed}'"
         )
 
     @commands.command(help="Be mean to someone. >:D")
@@ -331,13 +480,21 @@ class RandCommands(commands.Cog):
             return await reply(ctx, "Code is too long. Maximum length is 1000 characters.")
         if len(input) > 1000:
             return await reply(ctx, "Input is too long. Maximum length is 1000 characters.")
+        deets = self.bot.config.get("brainfuckDeets", {})
+        # The thread can't be killed, so it is told to stop instead when the timeout passes.
+        cancel = threading.Event()
         try:
-            output = await asyncio.wait_for(
-                asyncio.to_thread(process_brainfuck, code, input),
-                timeout=10.0
+            result = await asyncio.wait_for(
+                asyncio.to_thread(
+                    run_brainfuck, code, input, deets.get("maxInstructions", DEFAULT_MAX_INSTRUCTIONS), cancel
+                ),
+                timeout=deets.get("timeout", 10.0)
             )
         except asyncio.TimeoutError:
+            cancel.set()
             return await reply(ctx, "Processing took too long, terminating.")
+        self.bot.logger.info(f"Brainfuck program ran {result.instructions} instructions")
+        output = result.output if result.error is None else result.error
 
         if len(output) >= 2000:
             new_output = output[1900:] + f" ({len(output)-1900} characters remaining...)"
@@ -1,7 +1,8 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from datetime import datetime, timedelta
 
+from scheduler import DeadlineScheduler
 from util import is_discord_member
 from timeutil import UserFriendlyTime
 from paginator import EmbedPaginatorSession
@@ -15,19 +16,29 @@ def timestamp(dt, *, format="R") -> str:
 class Reminders(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.check_reminders.start()
+        self.scheduler = DeadlineScheduler("reminders", self.send_reminders)
+
+    async def cog_load(self):
+        # Reminders that came due while the bot was offline are sent right away.
+        for rowid, due in await self.bot.database.get_pending_reminders():
+            self.scheduler.schedule(rowid, due)
+        self.scheduler.start()
+
+    async def cog_unload(self):
+        self.scheduler.stop()
 
     @is_discord_member()
     @commands.command(name='remindme', aliases=['reminder', 'remind'])
     async def remind_me(self, ctx, *, time: UserFriendlyTime):
         """Set a reminder."""
         message = time.arg
-        await self.bot.database.add_reminder(
+        rowid = await self.bot.database.add_reminder(
             user_id=ctx.author.id,
             channel_id=ctx.channel.id,
             message=message,
             timestamp=time.dt
         )
+        self.scheduler.schedule(rowid, time.dt)
 
         msg = f"{ctx.author.mention}: I will remind you at {time.dt.strftime('%Y-%m-%d %H:%M:%S')} UTC ({timestamp(time.dt)}) "
         if message:
@@ -62,16 +73,15 @@ class Reminders(commands.Cog):
                     )
             await ctx.reply(embed=embed)
 
-    @tasks.loop(seconds=60)
-    async def check_reminders(self):
-        """Check for reminders that need to be sent."""
-        reminders = await self.bot.database.pop_expired_reminders()
+    async def send_reminders(self, rowids):
+        """Send the reminders that are due, called by the scheduler."""
+        reminders = await self.bot.database.pop_reminders(rowids)
         for reminder in reminders:
             user_id, channel_id, message = reminder
-            channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
             try:
+                channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
                 await channel.send(f"<@{user_id}>{f": {message}" if message else ""}")
-            except discord.Forbidden:
+            except (discord.Forbidden, discord.NotFound):
                 # If the bot cannot send messages to the channel, skip it
                 continue
 
@@ -1,9 +1,180 @@
-from collections import defaultdict
+import asyncio
+import logging
+import re
+import sys
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from pathlib import Path
+from time import perf_counter
+from types import MappingProxyType
 
 import aiosqlite
 
+from search import SearchIndex
+from suggest import SuggestionIndex
+
+logger = logging.getLogger("patrick.database")
+
+# The pragmas that may be set in the databaseDeets.pragmas config section. auto_vacuum goes first, see apply_pragmas.
+PRAGMAS = ("auto_vacuum", "journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store")
+AUTO_VACUUM_MODES = {"none": 0, "full": 1, "incremental": 2}
+# The configured pragmas that only apply to the connection they are set on, and so are set on the readers as well.
+CONNECTION_PRAGMAS = ("cache_size", "mmap_size", "temp_store")
+
+# The statements run by Connector.run_maintenance, by name.
+MAINTENANCE = (
+    ("optimize", "PRAGMA optimize"),
+    ("incremental vacuum", "PRAGMA incremental_vacuum"),
+    ("wal checkpoint", "PRAGMA wal_checkpoint(TRUNCATE)"),
+)
+
+# The schema, one migration per version. Never change a migration that was released, add a new one instead.
+MIGRATIONS = [
+    # 1: The original tables. Databases from before migrations already have them.
+    """
+    CREATE TABLE IF NOT EXISTS command_keys (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        key VARCHAR(128)
+    );
+    CREATE TABLE IF NOT EXISTS command_responses (
+        id INTEGER,
+        response TEXT
+    );
+    CREATE TABLE IF NOT EXISTS command_history (
+        user INTEGER,
+        command VARCHAR(128),
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS timers (
+        user_id INTEGER,
+        name VARCHAR(128),
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS reminders (
+        user_id INTEGER,
+        channel_id INTEGER,
+        message TEXT,
+        timestamp DATETIME
+    );
+    CREATE TABLE IF NOT EXISTS tempbans (
+        user_id INTEGER,
+        reason TEXT,
+        timestamp DATETIME
+    );
+    """,
+    # 2: Indexes for the lookups by key, user and expiry. Duplicate command keys are merged into the oldest one first.
+    """
+    UPDATE command_responses SET id = (
+        SELECT MIN(duplicate.id) FROM command_keys AS original
+        JOIN command_keys AS duplicate ON duplicate.key = original.key
+        WHERE original.id = command_responses.id
+    ) WHERE id IN (SELECT id FROM command_keys);
+    DELETE FROM command_keys WHERE id NOT IN (SELECT MIN(id) FROM command_keys GROUP BY key);
+    CREATE UNIQUE INDEX command_keys_key ON command_keys(key);
+    CREATE INDEX command_responses_id ON command_responses(id);
+    CREATE INDEX timers_user_id_name ON timers(user_id, name);
+    CREATE INDEX reminders_timestamp ON reminders(timestamp);
+    CREATE INDEX reminders_user_id ON reminders(user_id);
+    CREATE INDEX tempbans_timestamp ON tempbans(timestamp);
+    CREATE INDEX command_history_command_timestamp ON command_history(command, timestamp);
+    """,
+    # 3: Responses belong to their key and are deleted with it. SQLite can't add a foreign key, so the table is rebuilt.
+    """
+    CREATE TABLE command_responses_new (
+        id INTEGER REFERENCES command_keys(id) ON DELETE CASCADE,
+        response TEXT
+    );
+    INSERT INTO command_responses_new(id, response)
+        SELECT id, response FROM command_responses WHERE id IN (SELECT id FROM command_keys);
+    DROP TABLE command_responses;
+    ALTER TABLE command_responses_new RENAME TO command_responses;
+    CREATE INDEX command_responses_id ON command_responses(id);
+    """,
+    # 4: Roles handed out for a while, like slap and pikl, and when to take them away again.
+    """
+    CREATE TABLE role_expirations (
+        guild_id INTEGER,
+        user_id INTEGER,
+        role_id INTEGER,
+        timestamp DATETIME
+    );
+    CREATE INDEX role_expirations_user_id_role_id ON role_expirations(user_id, role_id);
+    """,
+    # 5: The guild a tempban is in. Older bans have none and are lifted in the guild of the audit log channel.
+    """
+    ALTER TABLE tempbans ADD COLUMN guild_id INTEGER;
+    """,
+    # 6: A log of the custom commands that changed, so the cache only has to reload those. See Connector.refresh_cache.
+    """
+    CREATE TABLE command_changes (
+        version INTEGER PRIMARY KEY AUTOINCREMENT,
+        key VARCHAR(128)
+    );
+    CREATE TRIGGER command_keys_insert AFTER INSERT ON command_keys BEGIN
+        INSERT INTO command_changes(key) VALUES(NEW.key);
+    END;
+    CREATE TRIGGER command_keys_delete AFTER DELETE ON command_keys BEGIN
+        INSERT INTO command_changes(key) VALUES(OLD.key);
+    END;
+    CREATE TRIGGER command_keys_update AFTER UPDATE ON command_keys BEGIN
+        INSERT INTO command_changes(key) VALUES(OLD.key), (NEW.key);
+    END;
+    CREATE TRIGGER command_responses_insert AFTER INSERT ON command_responses BEGIN
+        INSERT INTO command_changes(key) SELECT key FROM command_keys WHERE id = NEW.id;
+    END;
+    CREATE TRIGGER command_responses_delete AFTER DELETE ON command_responses BEGIN
+        INSERT INTO command_changes(key) SELECT key FROM command_keys WHERE id = OLD.id;
+    END;
+    CREATE TRIGGER command_responses_update AFTER UPDATE ON command_responses BEGIN
+        INSERT INTO command_changes(key) SELECT key FROM command_keys WHERE id IN (OLD.id, NEW.id);
+    END;
+    """,
+]
+
+# Frequent queries that should be answered from an index. Checked with EXPLAIN QUERY PLAN on every start, see find_table_scans.
+INDEXED_QUERIES = [
+    "SELECT id FROM command_keys WHERE key = ?",
+    "SELECT response FROM command_responses WHERE id = ?",
+    "SELECT name, timestamp FROM timers WHERE user_id = ?",
+    "DELETE FROM timers WHERE user_id = ? AND name = ?",
+    "SELECT message, channel_id, timestamp FROM reminders WHERE user_id = ?",
+    "DELETE FROM reminders WHERE rowid IN (?)",
+    "DELETE FROM tempbans WHERE rowid IN (?)",
+    "DELETE FROM role_expirations WHERE guild_id = ? AND user_id = ? AND role_id = ?",
+    "SELECT COUNT(*) FROM command_history WHERE command = ?",
+    "SELECT version, key FROM command_changes WHERE version > ?",
+]
+
+# Responses of all custom commands, in the order they were added
+COMMAND_RESPONSES = (
+    "SELECT key, response FROM command_keys JOIN command_responses ON command_keys.id = command_responses.id"
+)
+
+
+def is_table_scan(step: str) -> bool:
+    """Whether a step of a query plan reads a whole table. Scans of an index, like a covering index scan, don't count."""
+    return step.startswith("SCAN ") and " USING " not in step
+
+
+async def find_table_scans() -> list:
+    """Build the schema in an empty in-memory database and find the INDEXED_QUERIES that scan a whole table there.
+    The real database isn't used, because after ANALYZE the planner may rightly prefer a scan of a small table.
+
+    Returns:
+        list: (query, plan) pairs, with the plan as a list of steps.
+    """
+    scans = []
+    async with aiosqlite.connect(":memory:") as connection:
+        for migration in MIGRATIONS:
+            await connection.executescript(migration)
+        for query in INDEXED_QUERIES:
+            async with connection.execute(f"EXPLAIN QUERY PLAN {query}", (None,) * query.count("?")) as cursor:
+                plan = [row[3] for row in await cursor.fetchall()]
+            if any(is_table_scan(step) for step in plan):
+                scans.append((query, plan))
+    return scans
+
 
 def convert_datetime(val):
     """Convert ISO 8601 datetime to datetime.datetime object."""
@@ -13,77 +184,297 @@ def convert_datetime(val):
 aiosqlite.register_converter("datetime", convert_datetime)
 
 
+class ReadPool:
+    """A fixed amount of read-only connections, so reads don't wait in line behind the writes on the single writer.
+    With journal_mode WAL readers and the writer don't block each other.
+
+    Args:
+        database (Path): The database file.
+        size (int): The amount of connections.
+        pragmas (dict): The pragmas to set on every connection, validated by Connector.apply_pragmas.
+    """
+
+    def __init__(self, database: Path, size: int, pragmas: dict = None):
+        self.database = database
+        self.size = size
+        self.pragmas = pragmas or {}
+        self.idle = asyncio.Queue()
+        self.connections = []
+        self.acquired = 0
+        # Acquisitions that found no idle connection, and the seconds spent waiting
+        self.waited = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def open(self):
+        for _ in range(self.size):
+            connection = await aiosqlite.connect(f"{self.database.as_uri()}?mode=ro", uri=True, detect_types=True)
+            for name, value in self.pragmas.items():
+                await connection.execute(f"PRAGMA {name} = {value}")
+            self.connections.append(connection)
+            self.idle.put_nowait(connection)
+
+    async def close(self):
+        for connection in self.connections:
+            await connection.close()
+        self.connections.clear()
+        self.idle = asyncio.Queue()
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow an idle connection, waiting for one if they are all in use."""
+        self.acquired += 1
+        if self.idle.empty():
+            self.waited += 1
+            start = perf_counter()
+            connection = await self.idle.get()
+            waited = perf_counter() - start
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        else:
+            connection = self.idle.get_nowait()
+        try:
+            yield connection
+        finally:
+            self.idle.put_nowait(connection)
+
+    def stats(self) -> dict:
+        """The pool size and how long reads had to wait for a connection.
+
+        Returns:
+            dict: size, idle, acquired, waited, the average and the longest wait in milliseconds.
+        """
+        return {
+            "size": self.size,
+            "idle": self.idle.qsize(),
+            "acquired": self.acquired,
+            "waited": self.waited,
+            "average wait": 1000 * self.wait_total / self.waited if self.waited else 0.0,
+            "longest wait": 1000 * self.wait_max,
+        }
+
+
 class Connector:
-    def __init__(self):
+    """The connection to commands.db.
+    Command history is written behind: rows are queued in memory and inserted in batches by a background task,
+    so running a command doesn't wait for a disk sync.
+    Custom commands are served from an immutable snapshot that is replaced as a whole whenever they change, see commands_cache.
+
+    Args:
+        settings (dict): The databaseDeets config section.
+            historyBatchSize is the amount of queued rows that triggers a flush,
+            historyFlushInterval the maximum amount of seconds between flushes
+            and historyMaxQueued the amount of rows kept when flushes can't keep up. The oldest rows are dropped first.
+            pragmas are set on every connect, see PRAGMAS.
+            readPoolSize is the amount of read-only connections used for lookups, see ReadPool. 0 reads through the writer.
+    """
+
+    def __init__(self, settings: dict = None):
+        settings = settings or {}
         self.database = Path(__file__).parent / "commands.db"
         self.connection = None
-        # A cache dictionary for custom commands. The keys are the command names, and the value is a list of responses.
-        self.commands_cache = defaultdict(list)
+        # A read-only snapshot of the custom commands. The keys are the command names, and the value is a tuple of responses.
+        self.commands = MappingProxyType({})
+        # The last command_changes entry included in the snapshot. None until populate_cache ran.
+        self.commands_version = None
+        self.commands_lock = asyncio.Lock()
+        # Autocomplete over the keys and responses of the snapshot and "did you mean" suggestions for its keys,
+        # updated together with it
+        self.search = SearchIndex()
+        self.suggestions = SuggestionIndex()
+        self.history_batch_size = settings.get("historyBatchSize", 100)
+        self.history_flush_interval = settings.get("historyFlushInterval", 5)
+        self.history = deque(maxlen=settings.get("historyMaxQueued", 10000))
+        self.history_dropped = 0
+        self.history_full = asyncio.Event()
+        self.history_lock = asyncio.Lock()
+        self.history_task = None
+        self.pragmas = settings.get("pragmas", {})
+        self.readers = None
+        self.read_pool_size = settings.get("readPoolSize", 2)
 
     async def connect(self):
-        """Connect to the SQLite database and create the necessary tables if they do not exist."""
+        """Connect to the SQLite database and bring its schema up to date, see MIGRATIONS."""
         self.connection = await aiosqlite.connect(self.database, detect_types=True)
-        async with self.connection.cursor() as cursor:
-            await cursor.execute(
-                """CREATE TABLE IF NOT EXISTS command_keys (
-                                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                        key VARCHAR(128)
-                                    )"""
-            )
-            await cursor.execute(
-                """CREATE TABLE IF NOT EXISTS command_responses (
-                                        id INTEGER,
-                                        response TEXT
-                                    )"""
-            )
-            await cursor.execute(
-                """CREATE TABLE IF NOT EXISTS command_history (
-                                        user INTEGER,
-                                        command VARCHAR(128),
-                                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                                    )"""
-            )
-            await cursor.execute(
-                """CREATE TABLE IF NOT EXISTS timers (
-                                        user_id INTEGER,
-                                        name VARCHAR(128),
-                                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                                    )"""
-            )
-            await cursor.execute(
-                """CREATE TABLE IF NOT EXISTS reminders (
-                                        user_id INTEGER,
-                                        channel_id INTEGER,
-                                        message TEXT,
-                                        timestamp DATETIME
-                                        )"""
-            )
-            await cursor.execute(
-                """CREATE TABLE IF NOT EXISTS tempbans (
-                                        user_id INTEGER,
-                                        reason TEXT,
-                                        timestamp DATETIME
-                                    )"""
-            )
+        # Foreign keys are off by default and have to be enabled for every connection.
+        await self.connection.execute("PRAGMA foreign_keys = ON")
+        await self.apply_pragmas()
+        await self.migrate()
+        await self.check_query_plans()
+        if self.read_pool_size > 0:
+            pragmas = {name: value for name, value in self.pragmas.items() if name in CONNECTION_PRAGMAS}
+            self.readers = ReadPool(self.database, self.read_pool_size, pragmas)
+            await self.readers.open()
+        self.history_task = asyncio.create_task(self.flush_history_loop())
+
+    async def pragma(self, name: str):
+        async with self.connection.execute(f"PRAGMA {name}") as cursor:
+            return (await cursor.fetchone())[0]
+
+    async def apply_pragmas(self):
+        """Set the configured pragmas.
+        A new auto_vacuum mode only applies to a database with tables after a VACUUM, so that runs once when it changes.
+
+        Raises:
+            ValueError: When the config contains a pragma that isn't in PRAGMAS, or a value that isn't a plain word or number.
+        """
+        for name in sorted(self.pragmas, key=lambda pragma: PRAGMAS.index(pragma) if pragma in PRAGMAS else -1):
+            value = str(self.pragmas[name])
+            if name not in PRAGMAS:
+                raise ValueError(f"Unsupported pragma '{name}'")
+            if not re.fullmatch(r"-?\w+", value):
+                raise ValueError(f"Invalid value '{value}' for pragma '{name}'")
+            await self.connection.execute(f"PRAGMA {name} = {value}")
+            if name == "auto_vacuum":
+                wanted = AUTO_VACUUM_MODES.get(value.lower(), value)
+                if str(await self.pragma("auto_vacuum")) != str(wanted):
+                    logger.info(f"Changing auto_vacuum to {value}, vacuuming commands.db")
+                    await self.connection.execute("VACUUM")
+
+    async def fetchall(self, query: str, parameters: tuple = ()) -> list:
+        """Run a SELECT on a connection from the read pool, or on the writer when there is no pool.
+
+        Args:
+            query (str): The query.
+            parameters (tuple): The query parameters.
+
+        Returns:
+            list: All rows.
+        """
+        if self.readers is None:
+            async with self.connection.execute(query, parameters) as cursor:
+                return await cursor.fetchall()
+        async with self.readers.acquire() as connection:
+            async with connection.execute(query, parameters) as cursor:
+                return await cursor.fetchall()
+
+    async def run_maintenance(self) -> dict:
+        """Prune the command changes the cache has seen, run the statements in MAINTENANCE and log how long each step took.
+
+        Returns:
+            dict: The seconds each step took, by name.
+        """
+        timings = {}
+        if self.commands_version is not None:
+            # The changes the snapshot already contains aren't needed anymore.
+            start = perf_counter()
+            await self.connection.execute("DELETE FROM command_changes WHERE version <= ?", (self.commands_version,))
             await self.connection.commit()
+            timings["prune command changes"] = perf_counter() - start
+            logger.info(f"Database maintenance: prune command changes took {timings['prune command changes']:.3f}s")
+        for name, statement in MAINTENANCE:
+            start = perf_counter()
+            async with self.connection.execute(statement) as cursor:
+                await cursor.fetchall()
+            timings[name] = perf_counter() - start
+            logger.info(f"Database maintenance: {name} took {timings[name]:.3f}s")
+        return timings
+
+    async def migrate(self):
+        """Run the migrations the database hasn't seen yet. The schema version is stored in PRAGMA user_version.
+        Every migration runs in its own transaction together with the version bump, so a failed migration changes nothing.
+        """
+        async with self.connection.execute("PRAGMA user_version") as cursor:
+            (version,) = await cursor.fetchone()
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            logger.info(f"Migrating commands.db to version {number}")
+            await self.connection.executescript(f"BEGIN;\n{migration}\nPRAGMA user_version = {number};\nCOMMIT;")
+
+    async def check_query_plans(self):
+        """Log a warning for every frequent query that scans a whole table instead of using an index."""
+        for query, plan in await find_table_scans():
+            logger.warning(f"Query does a full table scan: {query} ({'; '.join(plan)})")
 
     async def close(self):
-        await self.connection.close()
+        """Write the queued command history and close the connections."""
+        if self.history_task is not None:
+            self.history_task.cancel()
+            self.history_task = None
+        if self.readers is not None:
+            await self.readers.close()
+            self.readers = None
+        if self.connection is not None:
+            await self.flush_history()
+            await self.connection.close()
+            self.connection = None
+
+    @property
+    def commands_cache(self) -> MappingProxyType:
+        """The current snapshot of the custom commands. Keep a reference to it to see a consistent state across awaits."""
+        return self.commands
+
+    @staticmethod
+    def group_responses(rows) -> dict:
+        """Group (key, response) rows into a dictionary of interned keys and tuples of responses."""
+        responses = defaultdict(list)
+        for key, response in rows:
+            responses[key].append(response)
+        return {sys.intern(key): tuple(values) for key, values in responses.items()}
+
+    async def changes_version(self) -> int:
+        rows = await self.fetchall("SELECT MAX(version) FROM command_changes")
+        return rows[0][0] or 0
 
     async def populate_cache(self):
-        """If not connected, connect to the database and populate the commands_cache dictionary with the keys and responses from the database.
-        The keys are the command names, and the value is a list of responses.
-        """
+        """If not connected, connect to the database. Then load all custom commands into a new snapshot and swap it in."""
         if self.connection is None:
             await self.connect()
 
-        async with self.connection.cursor() as cursor:
-            await cursor.execute(
-                "SELECT key, response FROM command_keys JOIN command_responses ON command_keys.id = command_responses.id"
+        async with self.commands_lock:
+            # Read the version first. Changes made in between are read again by the next refresh_cache, which is harmless.
+            version = await self.changes_version()
+            commands = self.group_responses(await self.fetchall(f"{COMMAND_RESPONSES} ORDER BY command_responses.rowid"))
+            search = SearchIndex()
+            search.load(commands, dict(await self.fetchall("SELECT command, COUNT(*) FROM command_history GROUP BY command")))
+            suggestions = SuggestionIndex()
+            for key in commands:
+                suggestions.add(key)
+            self.commands = MappingProxyType(commands)
+            self.commands_version = version
+            self.search = search
+            self.suggestions = suggestions
+
+    async def refresh_cache(self) -> int:
+        """Reload only the custom commands that changed since the snapshot was taken, according to command_changes,
+        and swap in a new snapshot with them.
+
+        Returns:
+            int: The amount of commands that were reloaded.
+        """
+        if self.commands_version is None:
+            await self.populate_cache()
+            return len(self.commands)
+
+        async with self.commands_lock:
+            changes = await self.fetchall(
+                "SELECT version, key FROM command_changes WHERE version > ?", (self.commands_version,)
+            )
+            if not changes:
+                return 0
+            keys = {key for _, key in changes}
+            rows = await self.fetchall(
+                f"{COMMAND_RESPONSES} WHERE key IN ({', '.join('?' * len(keys))}) ORDER BY command_responses.rowid",
+                tuple(keys),
             )
-            rows = await cursor.fetchall()
-            for key, response in rows:
-                self.commands_cache[key].append(response)
+            changed = self.group_responses(rows)
+            commands = dict(self.commands)
+            for key in keys:
+                if key in changed:
+                    commands[key] = changed[key]
+                    self.search.add(key, changed[key])
+                    self.suggestions.add(key)
+                else:
+                    commands.pop(key, None)
+                    self.search.remove(key)
+                    self.suggestions.remove(key)
+            self.commands = MappingProxyType(commands)
+            self.commands_version = max(version for version, _ in changes)
+            return len(keys)
+
+    async def commands_changed(self):
+        """Bring the snapshot up to date after a write, if there is one."""
+        if self.commands_version is not None:
+            await self.refresh_cache()
 
     async def get_command(self, key):
         """Get a command from the cache. If the command is not in the cache, return None.
@@ -92,12 +483,12 @@ class Connector:
             key (str): The command to get
 
         Returns:
-            list: A list of responses for the command, or None if the command is not in the cache.
+            tuple: The responses for the command, or None if the command is not in the cache.
         """
         return self.commands_cache.get(key)
 
     async def add_command(self, key, response):
-        """Add a command to the database and cache. The command is a key in the commands_cache dictionary, and the value is an initial response.
+        """Add a command to the database and cache. The command is a key in the commands_cache mapping, and the value is an initial response.
         The command is added to the command_keys table, and the response is added to the command_responses table with a foreign key reference to the command_keys table.
 
         Args:
@@ -111,26 +502,24 @@ class Connector:
             query = "INSERT INTO command_responses(id, response) VALUES(?, ?)"
             await cur.execute(query, (command_id, response))
             await self.connection.commit()
-            self.commands_cache[key] = [response]
+        await self.commands_changed()
 
     async def remove_command(self, key):
-        """Remove a command from the database and cache. The command is removed from the command_keys table, and all responses linked to it are removed from the command_responses table.
+        """Remove a command from the database and cache. The command is removed from the command_keys table,
+        which removes all responses linked to it from the command_responses table through the foreign key.
 
         Args:
             key (str): The command name to remove
         """
         async with self.connection.cursor() as cur:
-            query = "DELETE FROM command_responses WHERE id = (SELECT id FROM command_keys WHERE key = ?)"
-            await cur.execute(query, (key,))
             query = "DELETE FROM command_keys WHERE key = ?"
             await cur.execute(query, (key,))
             await self.connection.commit()
-            if key in self.commands_cache:
-                del self.commands_cache[key]
+        await self.commands_changed()
 
     async def add_command_response(self, key, response):
         """Add a response to an already existing command. The response is added to the command_responses table with a foreign key reference to the command_keys table.
-        The response is also added to the commands_cache dictionary for the command.
+        The response is also added to the commands_cache snapshot for the command.
         This function does not check if the command exists in the database and should only be used if the command is already in the cache.
 
         Args:
@@ -141,8 +530,7 @@ class Connector:
             query = "INSERT INTO command_responses(id, response) VALUES((SELECT id FROM command_keys WHERE key = ?), ?)"
             await cur.execute(query, (key, response))
             await self.connection.commit()
-            if key in self.commands_cache:
-                self.commands_cache[key].append(response)
+        await self.commands_changed()
 
     async def remove_command_response(self, key, response):
         """Removes a response from an already existing command. The response is removed from the command_responses table.
@@ -156,26 +544,62 @@ class Connector:
         async with self.connection.cursor() as cur:
             query = "DELETE FROM command_responses WHERE id = (SELECT id FROM command_keys WHERE key = ?) AND response = ?"
             await cur.execute(query, (key, response))
-            if key in self.commands_cache and response in self.commands_cache[key]:
-                self.commands_cache[key].remove(response)
-            # If the command has no responses left, remove it from the cache and database
-            if not self.commands_cache[key]:
-                del self.commands_cache[key]
-                query = "DELETE FROM command_keys WHERE key = ?"
-                await cur.execute(query, (key,))
+            # If the command has no responses left, remove it from the database
+            query = (
+                "DELETE FROM command_keys WHERE key = ? "
+                "AND NOT EXISTS (SELECT 1 FROM command_responses WHERE command_responses.id = command_keys.id)"
+            )
+            await cur.execute(query, (key,))
             await self.connection.commit()
+        await self.commands_changed()
 
     async def add_command_history(self, user, command):
-        """Add a histry entry to the database when a command is ran.
+        """Queue a history entry for when a command is ran. The entry is written to the database by the next flush.
+        The timestamp is taken now, in the same format as the CURRENT_TIMESTAMP default of the column.
 
         Args:
             user (str): The name of the user who ran the command
             command (str): The name of the command that was ran
         """
-        async with self.connection.cursor() as cur:
-            query = "INSERT INTO command_history(user, command) VALUES(?, ?)"
-            await cur.execute(query, (user, command))
-            await self.connection.commit()
+        if len(self.history) == self.history.maxlen:
+            self.history_dropped += 1
+        self.history.append((user, command, datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")))
+        self.search.used(command)
+        if len(self.history) >= self.history_batch_size:
+            self.history_full.set()
+
+    async def flush_history(self):
+        """Write all queued history entries in a single transaction."""
+        async with self.history_lock:
+            if self.history_dropped:
+                logger.warning(f"Dropped {self.history_dropped} command history entries, the queue was full")
+                self.history_dropped = 0
+            rows = list(self.history)
+            self.history.clear()
+            self.history_full.clear()
+            if not rows:
+                return
+            try:
+                await self.connection.executemany(
+                    "INSERT INTO command_history(user, command, timestamp) VALUES(?, ?, ?)", rows
+                )
+                await self.connection.commit()
+            except Exception:
+                logger.exception(f"Failed to write {len(rows)} command history entries, retrying on the next flush")
+                # Put them back in front of anything queued in the meantime, as far as the queue allows.
+                room = self.history.maxlen - len(self.history)
+                if room:
+                    self.history.extendleft(reversed(rows[-room:]))
+
+    async def flush_history_loop(self):
+        """Flush the command history whenever a batch is full, or at least every historyFlushInterval seconds."""
+        while True:
+            try:
+                await asyncio.wait_for(self.history_full.wait(), timeout=self.history_flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            # Shielded, so closing the connection doesn't cancel a batch halfway. close() waits for it instead.
+            await asyncio.shield(self.flush_history())
 
     async def start_timer(self, user_id, name):
         """Start a timer for a user. The timer is stored in the database with the user's ID and the name of the timer.
@@ -214,12 +638,8 @@ class Connector:
         Returns:
             list: A list of tuples with the name and timestamp of each timer
         """
-        async with self.connection.cursor() as cur:
-            query = "SELECT name, timestamp FROM timers WHERE user_id = ?"
-            await cur.execute(query, (user_id,))
-            rows = await cur.fetchall()
-            await self.connection.commit()
-            return rows
+        query = "SELECT name, timestamp FROM timers WHERE user_id = ?"
+        return await self.fetchall(query, (user_id,))
 
     async def add_reminder(self, user_id, channel_id, message, timestamp):
         """Add a reminder for a user. The reminder is stored in the database with the user's ID, message, and timestamp.
@@ -229,11 +649,15 @@ class Connector:
             channel_id (int): The ID of the channel where the reminder should be sent
             message (str): The message for the reminder
             timestamp (datetime): The time when the reminder should be triggered
+
+        Returns:
+            int: The rowid of the reminder
         """
         async with self.connection.cursor() as cur:
             query = "INSERT INTO reminders(user_id, channel_id, message, timestamp) VALUES(?, ?, ?, ?)"
             await cur.execute(query, (user_id, channel_id, message, timestamp))
             await self.connection.commit()
+            return cur.lastrowid
 
     async def get_reminders(self, user_id):
         """Get all reminders for a user. The reminders are returned as a list of tuples with the message and timestamp of each reminder.
@@ -244,39 +668,131 @@ class Connector:
         Returns:
             list: A list of tuples with the message, channel and timestamp of each reminder
         """
-        async with self.connection.cursor() as cur:
-            query = "SELECT message, channel_id, timestamp FROM reminders WHERE user_id = ?"
-            await cur.execute(query, (user_id,))
-            rows = await cur.fetchall()
-            return rows
+        query = "SELECT message, channel_id, timestamp FROM reminders WHERE user_id = ?"
+        return await self.fetchall(query, (user_id,))
 
-    async def pop_expired_reminders(self):
-        """Remove all expired reminders from the database. A reminder is considered expired if its timestamp is in the past."""
+    async def get_pending_reminders(self):
+        """Get the rowid and timestamp of every reminder, to schedule them.
+
+        Returns:
+            list: A list of tuples with the rowid and timestamp of each reminder
+        """
+        return await self.fetchall("SELECT rowid, timestamp FROM reminders")
+
+    async def pop_reminders(self, rowids):
+        """Remove reminders from the database.
+
+        Args:
+            rowids (list): The rowids of the reminders
+
+        Returns:
+            list: A list of tuples with the user, channel and message of each reminder that still existed
+        """
         async with self.connection.cursor() as cur:
-            query = "DELETE FROM reminders WHERE timestamp < ? RETURNING user_id, channel_id, message"
-            await cur.execute(query, (datetime.now(timezone.utc),))
+            query = f"DELETE FROM reminders WHERE rowid IN ({', '.join('?' * len(rowids))}) RETURNING user_id, channel_id, message"
+            await cur.execute(query, tuple(rowids))
             rows = await cur.fetchall()
             await self.connection.commit()
             return rows
-        
-    async def add_tempban(self, user_id, reason, timestamp):
+
+    async def add_tempban(self, user_id, reason, timestamp, guild_id=None):
         """Add a temporary ban for a user. The ban is stored in the database with the user's ID, reason, and expiration time.
 
         Args:
             user_id (int): The ID of the user to ban
             reason (str): The reason for the ban
             timestamp (datetime): The time when the ban expires
+            guild_id (int): The ID of the guild the user is banned from
+
+        Returns:
+            int: The rowid of the ban
         """
         async with self.connection.cursor() as cur:
-            query = "INSERT INTO tempbans(user_id, reason, timestamp) VALUES(?, ?, ?)"
-            await cur.execute(query, (user_id, reason, timestamp))
+            query = "INSERT INTO tempbans(user_id, reason, timestamp, guild_id) VALUES(?, ?, ?, ?)"
+            await cur.execute(query, (user_id, reason, timestamp, guild_id))
             await self.connection.commit()
+            return cur.lastrowid
+
+    async def get_pending_tempbans(self):
+        """Get the rowid and expiration time of every temporary ban, to schedule them.
+
+        Returns:
+            list: A list of tuples with the rowid and timestamp of each ban
+        """
+        return await self.fetchall("SELECT rowid, timestamp FROM tempbans")
 
-    async def pop_expired_tempbans(self):
-        """Remove all expired temporary bans from the database. A ban is considered expired if its timestamp is in the past."""
+    async def pop_tempbans(self, rowids):
+        """Remove temporary bans from the database.
+
+        Args:
+            rowids (list): The rowids of the bans
+
+        Returns:
+            list: A list of tuples with the guild and user of each ban that still existed. The guild is None for old bans
+        """
+        async with self.connection.cursor() as cur:
+            query = f"DELETE FROM tempbans WHERE rowid IN ({', '.join('?' * len(rowids))}) RETURNING guild_id, user_id"
+            await cur.execute(query, tuple(rowids))
+            rows = await cur.fetchall()
+            await self.connection.commit()
+            return rows
+
+    async def add_role_expiration(self, guild_id, user_id, role_id, timestamp):
+        """Store when a role should be taken away from a member again.
+
+        Args:
+            guild_id (int): The ID of the guild
+            user_id (int): The ID of the member
+            role_id (int): The ID of the role
+            timestamp (datetime): The time when the role should be removed
+
+        Returns:
+            int: The rowid of the expiration
+        """
+        async with self.connection.cursor() as cur:
+            query = "INSERT INTO role_expirations(guild_id, user_id, role_id, timestamp) VALUES(?, ?, ?, ?)"
+            await cur.execute(query, (guild_id, user_id, role_id, timestamp))
+            await self.connection.commit()
+            return cur.lastrowid
+
+    async def remove_role_expirations(self, guild_id, user_id, role_id):
+        """Forget when a role should be taken away from a member, for when it is taken away or handed out again early.
+
+        Args:
+            guild_id (int): The ID of the guild
+            user_id (int): The ID of the member
+            role_id (int): The ID of the role
+
+        Returns:
+            list: The rowids of the removed expirations
+        """
+        async with self.connection.cursor() as cur:
+            query = "DELETE FROM role_expirations WHERE guild_id = ? AND user_id = ? AND role_id = ? RETURNING rowid"
+            await cur.execute(query, (guild_id, user_id, role_id))
+            rows = await cur.fetchall()
+            await self.connection.commit()
+            return [rowid for rowid, in rows]
+
+    async def get_pending_role_expirations(self):
+        """Get the rowid and timestamp of every role expiration, to schedule them.
+
+        Returns:
+            list: A list of tuples with the rowid and timestamp of each expiration
+        """
+        return await self.fetchall("SELECT rowid, timestamp FROM role_expirations")
+
+    async def pop_role_expirations(self, rowids):
+        """Remove role expirations from the database.
+
+        Args:
+            rowids (list): The rowids of the expirations
+
+        Returns:
+            list: A list of tuples with the guild, user and role of each expiration that still existed
+        """
         async with self.connection.cursor() as cur:
-            query = "DELETE FROM tempbans WHERE timestamp < ? RETURNING user_id"
-            await cur.execute(query, (datetime.now(timezone.utc),))
+            query = f"DELETE FROM role_expirations WHERE rowid IN ({', '.join('?' * len(rowids))}) RETURNING guild_id, user_id, role_id"
+            await cur.execute(query, tuple(rowids))
             rows = await cur.fetchall()
             await self.connection.commit()
             return rows
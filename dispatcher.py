@@ -0,0 +1,109 @@
+import re
+from typing import NamedTuple, Optional
+
+from discord.ext import commands
+
+from suggest import SUGGESTIONS
+
+# Table entry of a custom command
+CUSTOM = object()
+# The command name after the prefix, up to the first whitespace. Like discord.py's StringView.get_word.
+WORD = re.compile(r"\S*")
+
+
+class Resolved(NamedTuple):
+    """What a message asks for. command is set for builtin commands, key for custom commands and neither when
+    the message has a prefix but names no command. invoker is the word after the prefix, the name the command was
+    invoked with."""
+    prefix: str
+    command: Optional[commands.Command]
+    key: Optional[str]
+    invoker: str
+
+
+class Dispatcher:
+    """Resolves messages to builtin or custom commands with a single prefix check and one table lookup.
+    The table maps every builtin name and alias, including the generated base conversion commands, to its command
+    and every custom key to CUSTOM. It is rebuilt when the command registry or the custom commands snapshot changes.
+    Builtin names win over custom keys, like they did when discord.py resolved the builtins first.
+
+    Args:
+        bot (commands.Bot): The bot with the command registry and the database with the custom commands.
+        prefixes (tuple): The command prefixes, in the order they are tried.
+    """
+
+    def __init__(self, bot: commands.Bot, prefixes: tuple):
+        self.bot = bot
+        self.prefixes = prefixes
+        # Messages that don't start with one of these characters can't be commands
+        self.first_characters = frozenset(prefix[0] for prefix in prefixes)
+        self.table = None
+        # The registry and custom commands snapshots the table was built from
+        self.registered = None
+        self.custom_commands = None
+
+    def build(self) -> dict:
+        registered = self.bot.registry.current
+        custom_commands = self.bot.database.commands_cache
+        table = dict.fromkeys(custom_commands, CUSTOM)
+        table.update(registered.builtins)
+        self.table = table
+        self.registered = registered
+        self.custom_commands = custom_commands
+        return table
+
+    def resolve(self, content: str) -> Optional[Resolved]:
+        """Find the command a message asks for.
+
+        Args:
+            content (str): The message content.
+
+        Returns:
+            Resolved: The prefix and the command or custom key, or None if the message doesn't start with a prefix.
+        """
+        if not content or content[0] not in self.first_characters:
+            return None
+        for prefix in self.prefixes:
+            if content.startswith(prefix):
+                break
+        else:
+            return None
+        table = self.table
+        if (
+            table is None
+            or self.registered is not self.bot.registry.snapshot
+            or self.custom_commands is not self.bot.database.commands_cache
+        ):
+            table = self.build()
+        rest = content[len(prefix):]
+        invoker = WORD.match(rest).group()
+        entry = table.get(invoker)
+        if entry is not None and entry is not CUSTOM:
+            return Resolved(prefix, entry, None, invoker)
+        # Custom keys may contain spaces, so the whole rest of the message is the key.
+        if table.get(rest) is CUSTOM:
+            return Resolved(prefix, None, rest, invoker)
+        return Resolved(prefix, None, None, invoker)
+
+    def suggest(self, rest: str, limit: int = SUGGESTIONS) -> list:
+        """Find the commands that were probably meant by a message that named no command.
+
+        Args:
+            rest (str): The message content after the prefix.
+            limit (int): The maximum amount of suggestions.
+
+        Returns:
+            list: The closest builtin names and custom keys, closest first.
+        """
+        word = WORD.match(rest).group()
+        builtins, custom = self.bot.registry.suggestions, self.bot.database.suggestions
+        matches = set(builtins.matches(word))
+        matches.update(custom.matches(word))
+        if rest != word:
+            # Custom keys may contain spaces
+            matches.update(custom.matches(rest))
+        suggestions = []
+        for _, name in sorted(matches):
+            if name not in suggestions:
+                suggestions.append(name)
+        return suggestions[:limit]
@@ -1,9 +1,29 @@
 import hashlib
 from math import ceil, cos, log, sin, sqrt
 from random import Random
+from time import time
 
+import numpy as np
 from PIL import Image
-from numpy import array
+
+import palette
+
+# Bump this whenever the output for the same parameters changes. Part of the render cache key.
+VERSION = 4
+# Pixels are iterated in bands of this many rows to keep the working arrays small.
+TILE_ROWS = 64
+# How many iterations run between deadline checks.
+DEADLINE_CHECK_INTERVAL = 64
+# Colour channels closer than this to an integer are recomputed with the scalar math functions,
+# because numpy's log may differ from math.log in the last bit and flip the int() truncation.
+COLOR_EPSILON = 1e-7
+# Squared distance under which an orbit counts as having returned to an earlier point.
+CYCLE_EPSILON = 1e-20
+
+
+class RenderTimeout(Exception):
+    """Raised by the render functions when the given deadline has passed."""
+    pass
 
 
 class Complex:
@@ -33,16 +53,23 @@ class Complex:
         return self.real * self.real + self.imag * self.imag
 
 
+# How many points along the ray find_good_julia tries.
+JULIA_SEARCH_STEPS = 1000
+
+
 # room for improvement but works 99.9% of times (never crashes just gives up and returns a bad one)
 def find_good_julia(angle, messiness):
+    """Walk a ray outwards and return the first point that escapes the mandelbrot set within messiness iterations.
+    All points on the ray are tested at once. The result is identical to stepping through them one by one.
+    """
     x = cos(angle) * 0.4 - 0.3
     y = sin(angle) * 0.4
-    coord = Complex(x, y)
-    step = coord * 0.005
-    for _ in range(1000):
-        coord += step
-        if mandel_pixel(coord, messiness + 1) <= messiness:
-            return coord
+    # Accumulating adds the steps one at a time, so the points match repeatedly doing coord += step.
+    c_real = np.add.accumulate(np.concatenate(([x], np.full(JULIA_SEARCH_STEPS, x * 0.005))))[1:]
+    c_imag = np.add.accumulate(np.concatenate(([y], np.full(JULIA_SEARCH_STEPS, y * 0.005))))[1:]
+    good = np.flatnonzero(mandel_escape(c_real, c_imag, messiness + 1) <= messiness)
+    if good.size:
+        return Complex(float(c_real[good[0]]), float(c_imag[good[0]]))
     # bad luck, will get an almost blank image
     return Complex(16.0, 0.0)
 
@@ -63,6 +90,20 @@ def mandel_pixel(coord: Complex, max_iterations: int) -> int:
     return i
 
 
+def mandel_escape(c_real, c_imag, max_iterations: int):
+    """Vectorized version of mandel_pixel. Returns the escape count for every point."""
+    iterations = np.full(c_real.size, max_iterations, dtype=np.int64)
+    zr = np.zeros_like(c_real)
+    zi = np.zeros_like(c_imag)
+    # Escaped points keep iterating, which is cheaper than compacting these small arrays. They may overflow.
+    with np.errstate(over="ignore", invalid="ignore"):
+        for i in range(max_iterations):
+            escaped = zr * zr + zi * zi > 4.0
+            iterations[escaped & (iterations == max_iterations)] = i
+            zr, zi = zr * zr - zi * zi + c_real, 2 * zr * zi + c_imag
+    return iterations
+
+
 def get_color(i: float, a: float, b: float, c: float) -> tuple:
     red = int(max(sin(i * a) * 255.0, 0.0))
     green = int(max(sin(i * b) * 255.0, 0.0))
@@ -87,29 +128,340 @@ def julia_pixel(coordinate: Complex, max_iterations: int, c: Complex) -> float:
     return float(i) + 1.0 - log(log(sqrt(z.mag2()))) * (1 / log(2))
 
 
-def fractal(
-    seed: str, width: int, height: int, max_iterations: int, messiness: int, zoom: float
-):
-    aspect_ratio = float(width) / float(height)
-    rng = Random(sha256_lower_long(seed))
+class Kernel:
+    """A family of escape time fractals. Kernels work on whole arrays of points, so adding one costs no per pixel python.
+    Every family shares the tiling, caching and colouring in this module and in the renderer.
+    """
+
+    name = ""
+    # The power of z in the iteration. Used by the smooth colouring.
+    degree = 2
+    # Point symmetric images are mirrored from their left half, so only half of the pixels are iterated.
+    symmetric = False
+    # Stop iterating points whose orbit settled into a cycle. Needed for families with large areas inside the set,
+    # but only approximate, so it's off for julia sets to keep them identical to julia_pixel.
+    detect_cycles = False
+
+    def search(self, rng: Random, messiness: int) -> tuple:
+        """Pick the parameters of a fractal from a seeded random generator.
+
+        Args:
+            rng (Random): The seeded random generator. Must be used deterministically.
+            messiness (int): How much detail the fractal should have.
+
+        Returns:
+            tuple: The parameters for coordinates. A plain tuple so it can be sent to worker processes.
+        """
+        raise NotImplementedError
+
+    def coordinates(self, co_x, co_y, params: tuple) -> tuple:
+        """Map view coordinates to starting points and constants.
+
+        Args:
+            co_x (np.ndarray): The real view coordinates, centred on 0 and scaled by the zoom.
+            co_y (np.ndarray): The imaginary view coordinates.
+            params (tuple): The parameters from search.
+
+        Returns:
+            tuple: (z_real, z_imag, c_real, c_imag). The constants may be scalars or arrays.
+        """
+        raise NotImplementedError
+
+    def step(self, zr, zi, cr, ci) -> tuple:
+        """Apply one iteration to arrays of points.
+
+        Returns:
+            tuple: The new (zr, zi).
+        """
+        raise NotImplementedError
+
+
+class JuliaKernel(Kernel):
+    """z^2 + c with a constant c just outside the mandelbrot set."""
+
+    name = "julia"
+    symmetric = True
+
+    def search(self, rng, messiness):
+        angle = rng.uniform(-3.14, 3.14)
+        seed_coordinate = find_good_julia(angle, messiness)
+        return seed_coordinate.real, seed_coordinate.imag
+
+    def coordinates(self, co_x, co_y, params):
+        return co_x, co_y, params[0], params[1]
+
+    def step(self, zr, zi, cr, ci):
+        # Same operation order as Complex.square() + c so the results are bit for bit identical to julia_pixel.
+        return zr * zr - zi * zi + cr, 2 * zr * zi + ci
+
+
+class ParameterKernel(Kernel):
+    """Base for families that iterate from z = 0 with c taken from the pixel, like the mandelbrot set.
+    The search walks a random ray from radius towards the origin and centres the view on the first point
+    that doesn't escape within messiness iterations, which lies on the edge of the set.
+    """
+
+    # Where the search ray starts. Must be outside the set, while the origin must be inside.
+    radius = 2.0
+    detect_cycles = True
+
+    def search(self, rng, messiness):
+        angle = rng.uniform(-3.14, 3.14)
+        scale = rng.uniform(0.01, 0.1)
+        distances = np.linspace(self.radius, 0.0, 1000)
+        c_real = distances * cos(angle)
+        c_imag = distances * sin(angle)
+        zeros = np.zeros_like(distances)
+        iterations, _ = escape(self, zeros, zeros, c_real, c_imag, messiness + 1)
+        inside = np.flatnonzero(iterations > messiness)
+        index = inside[0] if inside.size else distances.size - 1
+        return float(c_real[index]), float(c_imag[index]), scale
+
+    def coordinates(self, co_x, co_y, params):
+        center_real, center_imag, scale = params
+        zeros = np.zeros_like(co_x)
+        return zeros, zeros, center_real + co_x * scale, center_imag + co_y * scale
+
+
+class MandelbrotKernel(ParameterKernel):
+    """The mandelbrot set, z^2 + c."""
+
+    name = "mandelbrot"
+
+    def step(self, zr, zi, cr, ci):
+        return zr * zr - zi * zi + cr, 2 * zr * zi + ci
+
+
+class BurningShipKernel(ParameterKernel):
+    """The burning ship fractal, (|Re z| + i|Im z|)^2 + c."""
+
+    name = "burningship"
 
-    angle = rng.uniform(-3.14, 3.14)
-    seed_coordinate = find_good_julia(angle, messiness)
+    def step(self, zr, zi, cr, ci):
+        return zr * zr - zi * zi + cr, 2 * np.abs(zr * zi) + ci
+
+
+class MultibrotKernel(ParameterKernel):
+    """The cubic multibrot set, z^3 + c."""
+
+    name = "multibrot"
+    degree = 3
+    radius = 1.5
+
+    def step(self, zr, zi, cr, ci):
+        zr2 = zr * zr
+        zi2 = zi * zi
+        return zr * (zr2 - 3 * zi2) + cr, zi * (3 * zr2 - zi2) + ci
+
+
+KERNELS = {
+    kernel.name: kernel
+    for kernel in (JuliaKernel(), MandelbrotKernel(), BurningShipKernel(), MultibrotKernel())
+}
+
+
+def fractal_params(seed: str, messiness: int, family: str = "julia") -> tuple:
+    """Derive the parameters of a fractal and its colour factors from a seed.
+
+    Args:
+        seed (str): The seed to derive the parameters from.
+        messiness (int): How much detail the fractal should have.
+        family (str): The name of the kernel in KERNELS.
+
+    Returns:
+        tuple: (kernel parameters, (a, b, c) colour factors).
+    """
+    rng = Random(sha256_lower_long(seed))
+    params = KERNELS[family].search(rng, messiness)
 
     a = rng.uniform(0.0, 0.2)
     b = rng.uniform(0.0, 0.2)
     c = rng.uniform(0.0, 0.2)
+    return params, (a, b, c)
+
+
+def escape(kernel: Kernel, z_real, z_imag, c_real, c_imag, max_iterations, deadline=None):
+    """Iterate all given points of a kernel at once, the vectorized version of julia_pixel.
+    Points that escape are removed from the working set, so every iteration only costs as much as the points still running.
+
+    Args:
+        kernel (Kernel): The kernel to iterate.
+        z_real (np.ndarray): The real parts of the starting points.
+        z_imag (np.ndarray): The imaginary parts of the starting points.
+        c_real (Union[float, np.ndarray]): The real part of the constant, or one per point.
+        c_imag (Union[float, np.ndarray]): The imaginary part of the constant, or one per point.
+        max_iterations (int): The maximum amount of iterations per point.
+        deadline (float, optional): A time.time() timestamp after which a RenderTimeout is raised.
+
+    Returns:
+        tuple: (iterations, mag2). The escape count per point and the squared magnitude after the 3 extra iterations.
+            Points that never escaped have iterations == max_iterations and mag2 == 0.
+    """
+    count = z_real.size
+    iterations = np.full(count, max_iterations, dtype=np.int64)
+    mag2 = np.zeros(count, dtype=np.float64)
+    active = np.arange(count)
+    zr = z_real.astype(np.float64, copy=True)
+    zi = z_imag.astype(np.float64, copy=True)
+    per_point = np.ndim(c_real) > 0
+    cr, ci = c_real, c_imag
+    # Orbits are compared against a snapshot taken at every power of two iterations to find points caught in a cycle.
+    saved_r, saved_i, save_at = zr, zi, 1
+    for i in range(max_iterations):
+        if deadline is not None and i % DEADLINE_CHECK_INTERVAL == 0 and time() > deadline:
+            raise RenderTimeout()
+        escaped = zr * zr + zi * zi >= 4.0
+        done = escaped
+        if escaped.any():
+            indices = active[escaped]
+            iterations[indices] = i
+            er, ei = zr[escaped], zi[escaped]
+            ecr, eci = (cr[escaped], ci[escaped]) if per_point else (cr, ci)
+            for _ in range(3):
+                er, ei = kernel.step(er, ei, ecr, eci)
+            mag2[indices] = er * er + ei * ei
+        if kernel.detect_cycles:
+            if i == save_at:
+                saved_r, saved_i, save_at = zr, zi, save_at * 2
+            elif i > 0:
+                # Points in a cycle never escape, they keep iterations == max_iterations.
+                # Before the first step the snapshot is the orbit itself, so there is nothing to compare yet.
+                done = escaped | ((zr - saved_r) ** 2 + (zi - saved_i) ** 2 < CYCLE_EPSILON)
+        if done.any():
+            running = ~done
+            active = active[running]
+            zr = zr[running]
+            zi = zi[running]
+            if kernel.detect_cycles:
+                saved_r = saved_r[running]
+                saved_i = saved_i[running]
+            if per_point:
+                cr = cr[running]
+                ci = ci[running]
+            if active.size == 0:
+                break
+        zr, zi = kernel.step(zr, zi, cr, ci)
+    return iterations, mag2
+
+
+def smooth_colors(iterations, mag2, max_iterations, colors, degree=2, lookup_table=False):
+    """Vectorized version of the smoothing in julia_pixel combined with get_color.
+    With lookup_table the colours are mapped through a palette cached per seed instead. That is faster, but the smooth
+    values are rounded to 1/palette.RESOLUTION of an iteration, so colours can be a shade off get_color.
+
+    Args:
+        iterations (np.ndarray): The escape count per point.
+        mag2 (np.ndarray): The squared magnitude per point after escaping.
+        max_iterations (int): The maximum amount of iterations.
+        colors (tuple): The (a, b, c) colour factors.
+        degree (int): The power of z in the iteration.
+        lookup_table (bool): Colour through palette.cached_sine.
+
+    Returns:
+        np.ndarray: An (n, 3) uint8 array of colours.
+    """
+    escaped = iterations < max_iterations
+    smooth = iterations.astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # actual magic
+        smooth[escaped] = (smooth[escaped] + 3.0) + 1.0 - np.log(np.log(np.sqrt(mag2[escaped]))) * (1 / log(degree))
+    if lookup_table:
+        # The smoothing never adds more than the 4 extra iterations.
+        return palette.lookup(palette.cached_sine(tuple(colors), max_iterations + 4), smooth)
+    channels = np.sin(smooth[:, None] * np.array(colors)) * 255.0
+    result = np.maximum(channels, 0.0).astype(np.uint8)
 
-    img_array = array(
-        [[(0, 0, 0) for _ in range(height)] for _ in range(width)], dtype="uint8"
-    )
-    for y in range(height):
-        for x in range(int(ceil(float(width) / 2.0))):
-            co_x = aspect_ratio * zoom * (float(x) / float(width) - 0.5)
-            co_y = zoom * (float(y) / float(height) - 0.5)
-            coordinate = Complex(co_x, co_y)
-            iterations = julia_pixel(coordinate, max_iterations, seed_coordinate)
-            color = get_color(iterations, a, b, c)
-            img_array[y][x] = color
-            img_array[height - y - 1][width - x - 1] = color
-    return Image.fromarray(img_array, "RGB")
+    # Recompute the colours that are within rounding distance of a truncation boundary with the scalar functions.
+    uncertain = (np.abs(channels - np.rint(channels)) < COLOR_EPSILON).any(axis=1)
+    for index in np.flatnonzero(uncertain):
+        i = float(iterations[index])
+        if escaped[index]:
+            i = (i + 3.0) + 1.0 - log(log(sqrt(float(mag2[index])))) * (1 / log(degree))
+        result[index] = get_color(i, *colors)
+    return result
+
+
+def columns(family: str, width: int) -> int:
+    """The amount of columns that have to be rendered. Symmetric families only render the left half."""
+    return int(ceil(float(width) / 2.0)) if KERNELS[family].symmetric else width
+
+
+def render_tile(
+    family: str, params: tuple, width: int, height: int, max_iterations: int, zoom: float, row_start: int, row_stop: int,
+    deadline=None, lookup_table: bool = False
+):
+    """Render a band of rows of a fractal. Only the left half is rendered for symmetric families.
+
+    Args:
+        family (str): The name of the kernel in KERNELS.
+        params (tuple): The parameters as returned by fractal_params.
+        width (int): The width of the full image.
+        height (int): The height of the full image.
+        max_iterations (int): The maximum amount of iterations per pixel.
+        zoom (float): The zoom factor.
+        row_start (int): The first row of the band.
+        row_stop (int): The row after the last row of the band.
+        deadline (float, optional): A time.time() timestamp after which a RenderTimeout is raised.
+        lookup_table (bool): Colour through a palette lookup table, see smooth_colors.
+
+    Returns:
+        np.ndarray: A (row_stop - row_start, columns(family, width), 3) uint8 array.
+    """
+    kernel = KERNELS[family]
+    kernel_params, colors = params
+    aspect_ratio = float(width) / float(height)
+    cols = columns(family, width)
+    xs = np.arange(cols, dtype=np.float64)
+    ys = np.arange(row_start, row_stop, dtype=np.float64)
+    co_x = aspect_ratio * zoom * (xs / float(width) - 0.5)
+    co_y = zoom * (ys / float(height) - 0.5)
+    co_x = np.broadcast_to(co_x, (ys.size, cols)).ravel()
+    co_y = np.broadcast_to(co_y[:, None], (ys.size, cols)).ravel()
+    z_real, z_imag, c_real, c_imag = kernel.coordinates(co_x, co_y, kernel_params)
+    iterations, mag2 = escape(kernel, z_real, z_imag, c_real, c_imag, max_iterations, deadline)
+    colored = smooth_colors(iterations, mag2, max_iterations, colors, kernel.degree, lookup_table)
+    return colored.reshape(ys.size, cols, 3)
+
+
+def mirror_half(left, width: int, height: int):
+    """Build the full image from its left half using the point symmetry of julia sets.
+    The result matches writing every pixel to (y, x) and (height - y - 1, width - x - 1) row by row.
+
+    Args:
+        left (np.ndarray): The (height, ceil(width / 2), 3) left half of the image.
+        width (int): The width of the full image.
+        height (int): The height of the full image.
+
+    Returns:
+        np.ndarray: The (height, width, 3) image.
+    """
+    half = left.shape[1]
+    img_array = np.zeros((height, width, 3), dtype=np.uint8)
+    img_array[:, :half] = left
+    img_array[::-1, ::-1][:, :half] = left
+    if width % 2:
+        # The middle column maps onto itself. Row by row, the row furthest down wins.
+        rows = np.arange(height)
+        img_array[:, half - 1] = left[np.maximum(rows, height - rows - 1), half - 1]
+    return img_array
+
+
+def assemble(family: str, rendered, width: int, height: int):
+    """Build the full (height, width, 3) image from the rendered columns."""
+    if KERNELS[family].symmetric:
+        return mirror_half(rendered, width, height)
+    return rendered
+
+
+def fractal(
+    seed: str, width: int, height: int, max_iterations: int, messiness: int, zoom: float, family: str = "julia",
+    deadline=None, lookup_table: bool = False
+):
+    params = fractal_params(seed, messiness, family)
+    rendered = np.empty((height, columns(family, width), 3), dtype=np.uint8)
+    for row_start in range(0, height, TILE_ROWS):
+        row_stop = min(row_start + TILE_ROWS, height)
+        rendered[row_start:row_stop] = render_tile(
+            family, params, width, height, max_iterations, zoom, row_start, row_stop, deadline, lookup_table
+        )
+    return Image.fromarray(assemble(family, rendered, width, height), "RGB")
@@ -0,0 +1,102 @@
+from io import BytesIO
+from time import perf_counter
+
+from PIL import Image
+
+# Discord's upload limit for servers without boosts.
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+# The formats from the largest to the smallest output. Fallbacks never go back to a larger format.
+FORMAT_ORDER = ("png", "webp", "jpeg")
+# Lossy qualities that are tried in order when an image doesn't fit the upload limit.
+FALLBACK_QUALITIES = (90, 80, 70, 60, 50, 40)
+
+MAGIC_NUMBERS = {
+    b"\x89PNG": "png",
+    b"\xff\xd8\xff": "jpg",
+    b"GIF8": "gif",
+}
+
+
+class ImageTooLarge(Exception):
+    """Raised when an image doesn't fit the upload limit in any of the available formats."""
+    pass
+
+
+def encode(image: Image.Image, fmt: str, compress_level: int = 6, quality: int = 90, lossless: bool = False) -> bytes:
+    """Encode an image.
+
+    Args:
+        image (Image.Image): The image to encode.
+        fmt (str): One of "png", "webp", "jpeg" or "gif".
+        compress_level (int): The zlib compression level for png, 0-9.
+        quality (int): The quality for webp and jpeg, 1-100.
+        lossless (bool): Encode webp losslessly. The quality is then used as compression effort.
+
+    Returns:
+        bytes: The encoded image.
+    """
+    with BytesIO() as image_binary:
+        match fmt:
+            case "png":
+                image.save(image_binary, "PNG", compress_level=compress_level)
+            case "webp":
+                image.save(image_binary, "WEBP", quality=quality, lossless=lossless, method=4)
+            case "jpeg":
+                image.save(image_binary, "JPEG", quality=quality, optimize=True)
+            case "gif":
+                image.save(image_binary, "GIF")
+            case _:
+                raise ValueError(f"Unknown image format '{fmt}'")
+        return image_binary.getvalue()
+
+
+def candidates(settings: dict):
+    """Yield the encoder arguments to try, from the configured format down to smaller lossy encodings."""
+    fmt = settings.get("format", "png")
+    compress_level = settings.get("compressLevel", 6)
+    quality = settings.get("quality", 90)
+    yield fmt, compress_level, quality, False
+    if fmt == "png":
+        yield "webp", compress_level, 100, True
+    for fallback in FORMAT_ORDER[max(FORMAT_ORDER.index(fmt), 1):]:
+        for fallback_quality in FALLBACK_QUALITIES:
+            if fallback_quality <= quality and (fallback, fallback_quality) != (fmt, quality):
+                yield fallback, compress_level, fallback_quality, False
+
+
+def encode_to_fit(image: Image.Image, settings: dict) -> bytes:
+    """Encode an image in the configured format, falling back to smaller encodings until it fits the upload limit.
+
+    Args:
+        image (Image.Image): The image to encode.
+        settings (dict): The renderDeets output settings: format, compressLevel, quality and maxUploadBytes.
+
+    Raises:
+        ImageTooLarge: When not even the smallest encoding fits.
+
+    Returns:
+        bytes: The encoded image.
+    """
+    max_bytes = settings.get("maxUploadBytes", DEFAULT_MAX_BYTES)
+    for fmt, compress_level, quality, lossless in candidates(settings):
+        data = encode(image, fmt, compress_level, quality, lossless)
+        if len(data) <= max_bytes:
+            return data
+    raise ImageTooLarge()
+
+
+def timed_encode(image: Image.Image, settings: dict) -> tuple:
+    """encode_to_fit, returning (data, seconds spent encoding)."""
+    start = perf_counter()
+    data = encode_to_fit(image, settings)
+    return data, perf_counter() - start
+
+
+def extension(data: bytes) -> str:
+    """Get the file extension for an encoded image from its magic number."""
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    for magic, ext in MAGIC_NUMBERS.items():
+        if data.startswith(magic):
+            return ext
+    return "png"
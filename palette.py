@@ -0,0 +1,65 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Palette entries per unit of the mapped value. Values are rounded to the nearest entry.
+RESOLUTION = 64
+# How many palettes are kept by cached_sine. Tiles of the same render share one palette.
+CACHE_SIZE = 16
+
+
+def sine(colors: tuple, max_value: float, resolution: int = RESOLUTION) -> np.ndarray:
+    """Build a lookup table for the fractal colouring, max(sin(value * factor) * 255, 0) per channel.
+
+    Args:
+        colors (tuple): The (a, b, c) colour factors for red, green and blue.
+        max_value (float): The largest value that will be looked up.
+        resolution (int): The amount of entries per unit of value.
+
+    Returns:
+        np.ndarray: A (ceil(max_value * resolution) + 1, 3) uint8 array.
+    """
+    values = np.arange(int(np.ceil(max_value * resolution)) + 1, dtype=np.float64) / resolution
+    channels = np.sin(values[:, None] * np.array(colors)) * 255.0
+    return np.maximum(channels, 0.0).astype(np.uint8)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def cached_sine(colors: tuple, max_value: float, resolution: int = RESOLUTION) -> np.ndarray:
+    """sine, but the palettes are kept per set of colour factors. Since those come from the seed, this caches by seed."""
+    palette = sine(colors, max_value, resolution)
+    palette.flags.writeable = False
+    return palette
+
+
+def gradient(start: tuple, end: tuple, steps: int) -> np.ndarray:
+    """Build a linear gradient between two colours. Channels are truncated like int().
+
+    Args:
+        start (tuple): The (r, g, b) colour of the first entry.
+        end (tuple): The (r, g, b) colour of the last entry.
+        steps (int): The amount of entries.
+
+    Returns:
+        np.ndarray: A (steps, 3) uint8 array.
+    """
+    ratio = np.arange(steps, dtype=np.float64)[:, None] / (steps - 1)
+    return (np.array(start) * (1 - ratio) + np.array(end) * ratio).astype(np.uint8)
+
+
+def lookup(palette: np.ndarray, values, resolution: int = RESOLUTION) -> np.ndarray:
+    """Map an array of continuous values through a palette in one gather.
+    Values are rounded to the nearest entry and clamped to the palette.
+
+    Args:
+        palette (np.ndarray): The (n, 3) palette.
+        values (np.ndarray): The values to map.
+        resolution (int): The amount of palette entries per unit of value.
+
+    Returns:
+        np.ndarray: A values.shape + (3,) uint8 array.
+    """
+    # NaN comes from orbits that overflowed, those are drawn like the start of the palette.
+    indices = np.nan_to_num(np.rint(values * resolution), nan=0.0)
+    np.clip(indices, 0, len(palette) - 1, out=indices)
+    return palette[indices.astype(np.intp)]
@@ -1,5 +1,6 @@
 import logging
 import re
+import typing
 from os import getenv, listdir
 from pathlib import Path
 
@@ -7,11 +8,16 @@ import discord
 import yaml
 from aiohttp import ClientSession
 from discord.ext import commands
+from discord.ext.commands.view import StringView
 from dotenv import load_dotenv
 
 
 import database
+from dispatcher import Dispatcher
 from logger import StreamLogFormatter, setup_logger
+from registry import CommandRegistry
+from render_cache import RenderCache
+from renderer import Renderer
 from util import (find_automod_matches, is_admin, load_automod_regexes,
                   process_custom_command, reformat_relay_chat, split_list,
                   reply, create_automod_embed, RelayMember)
@@ -47,7 +53,7 @@ class PatrickHelp(commands.HelpCommand):
                 command.signature,
                 command.help if command.help is not None else "",
             )
-            for command in self.context.bot.commands
+            for command in self.context.bot.registry.current.commands
         }
         custom_commands = self.context.bot.database.commands_cache
         return commands_, custom_commands
@@ -169,7 +175,20 @@ class Patrick(commands.Bot):
     def __init__(self, logger_: logging.Logger, config_: dict):
         self.logger = logger_
         self.config = config_
-        self.database = database.Connector()
+        self.database = database.Connector(self.config.get("databaseDeets", {}))
+        render_settings = self.config.get("renderDeets", {})
+        self.renderer = Renderer(
+            RenderCache(
+                max_bytes=render_settings.get("cacheBytes", 64 * 1024 * 1024),
+                directory=render_settings.get("cacheDirectory", "render_cache"),
+                max_disk_bytes=render_settings.get("cacheDiskBytes", 512 * 1024 * 1024),
+            ),
+            workers=render_settings.get("workers", 2),
+            max_renders=render_settings.get("maxRenders", 2),
+            tile_rows=render_settings.get("tileRows", 64),
+            output=render_settings.get("output", {}),
+            lookup_table=self.config.get("fractalDeets", {}).get("paletteLookup", False),
+        )
         self.relay_regex = re.compile(
             self.config.get(
                 "ingame_regex",
@@ -182,11 +201,13 @@ class Patrick(commands.Bot):
         intents.message_content = True
         intents.members = True
 
+        # The prefix with an extra space was a suggestion in the discord server. Mobile users might have automatic spaces added after punctuation.
+        prefixes = (", ", ",")
+        # Created first, discord.py already adds the help command while initialising the bot.
+        self.registry = CommandRegistry(self)
+        self.dispatcher = Dispatcher(self, prefixes)
         super().__init__(
-            command_prefix=(
-                ", ",
-                ",",
-            ),  # The prefix with an extra space was a suggestion in the discord server. Mobile users might have automatic spaces added after punctuation.
+            command_prefix=prefixes,
             case_insensitive=False,
             intents=intents,
             activity=activity,
@@ -203,6 +224,14 @@ class Patrick(commands.Bot):
         await self.load_extensions()
         self.logger.info(f"Logged in as {self.user}")
 
+    async def close(self):
+        """Called by discord.py when the bot shuts down.
+        Stops the render workers and writes the queued command history before disconnecting.
+        """
+        self.renderer.close()
+        await self.database.close()
+        await super().close()
+
     async def on_message(self, message: discord.Message) -> None:
         """This function is an event listener that is called when a message is sent in a channel the bot can see.
         First it will check if the message is from the bot itself, if it is, it will ignore it.
@@ -250,38 +279,81 @@ class Patrick(commands.Bot):
     async def process_commands(self, message: discord.Message) -> None:
         """An override of the process_commands function to add custom command processing.
         This is called after on_message has prepared the message for command processing.
+        The dispatcher resolves the command first, so chatter is dropped right away, custom commands are answered
+        without building a Context and builtins get a Context built from what the dispatcher found.
 
         Args:
             message (discord.Message): The message that was sent.
         """
-        ctx = await self.get_context(
-            message
-        )  # get_context is a discord.py function that create a Context object from a message.
-        if ctx.command is None and ctx.prefix is not None:
-            # If the context found none, but there is a valid prefix, it means the user is trying to run a custom command.
-            custom_command_ran = await process_custom_command(self, message)
-            if custom_command_ran:
-                # When a custom command is ran, we can stop processing.
-                return
-            else:
-                # A prefix was found, but no (custom) command was found. This means the user is trying to run a command that does not exist.
-                self.logger.info(
-                    f"User '{ctx.author.display_name}' attempted to run an unrecognized command: '{ctx.message.content[1:]}'"
-                )
-                return await reply(ctx, "Unrecognized command :'(")
-
-        if ctx.valid:
-            # The context is valid when a command and prefix was found.
-            # This is provided by discord.py and ensures that the context is valid for regular command processing
+        resolved = self.dispatcher.resolve(message.content)
+        if resolved is None:
+            # No prefix, so not a command.
+            return
+        if resolved.key is not None:
+            await process_custom_command(self, message, resolved.key)
+            return
+        if resolved.command is None:
+            # A prefix was found, but no (custom) command was found. This means the user is trying to run a command that does not exist.
             self.logger.info(
-                f"User '{message.author.display_name}' ran command '{ctx.command.name}'"
+                f"User '{message.author.display_name}' attempted to run an unrecognized command: '{message.content[1:]}'"
             )
-            await self.database.add_command_history(
-                message.author.display_name, ctx.command.name
-            )
-            await self.invoke(
-                ctx
-            )  # pass off to discord.py to handle the command processing.
+            suggestions = self.dispatcher.suggest(message.content[len(resolved.prefix):])
+            text = f"{message.author.display_name}: Unrecognized command :'("
+            if suggestions:
+                text += f" Did you mean {' or '.join(f'`{self.command_prefix[1]}{name}`' for name in suggestions)}?"
+            await message.channel.send(text)
+            return
+
+        # The dispatcher already parsed the prefix and the command name, so the context starts right after them
+        # instead of get_context parsing the message again.
+        view = StringView(message.content)
+        view.previous = len(resolved.prefix)
+        view.index = len(resolved.prefix) + len(resolved.invoker)
+        ctx = commands.Context(
+            prefix=resolved.prefix,
+            view=view,
+            bot=self,
+            message=message,
+            command=resolved.command,
+            invoked_with=resolved.invoker,
+        )
+        self.logger.info(
+            f"User '{message.author.display_name}' ran command '{ctx.command.name}'"
+        )
+        await self.database.add_command_history(
+            message.author.display_name, ctx.command.name
+        )
+        await self.invoke(
+            ctx
+        )  # pass off to discord.py to handle the command processing.
+
+    def add_command(self, command: commands.Command, /) -> None:
+        super().add_command(command)
+        self.registry.added(command)
+
+    def remove_command(self, name: str, /) -> typing.Optional[commands.Command]:
+        command = super().remove_command(name)
+        self.registry.removed(name, command)
+        return command
+
+    async def load_extension(self, name: str, *, package: typing.Optional[str] = None) -> None:
+        try:
+            await super().load_extension(name, package=package)
+        finally:
+            # Extensions can also change commands without add_command, like adding subcommands to a group.
+            self.registry.invalidate()
+
+    async def unload_extension(self, name: str, *, package: typing.Optional[str] = None) -> None:
+        try:
+            await super().unload_extension(name, package=package)
+        finally:
+            self.registry.invalidate()
+
+    async def reload_extension(self, name: str, *, package: typing.Optional[str] = None) -> None:
+        try:
+            await super().reload_extension(name, package=package)
+        finally:
+            self.registry.invalidate()
 
     async def load_extensions(self):
         """A function to load all extension in the ./cogs directory.
@@ -329,44 +401,46 @@ class Patrick(commands.Bot):
         await self.load_extensions()
 
 
-config = load_config()
-
-# Set up logging
-logging_settings = config.get("logging", {})
-logging_level = logging_settings.get("level", "INFO").upper()
-if logging_level in ("DEBUG", "INFO", "WARN", "ERROR", "CRITICAL"):
-    logger = setup_logger("patrick", logging_level, logging_settings)
-else:
-    print("Invalid logging level in config.yaml, defaulting to INFO")
-    logger = setup_logger("patrick", "INFO", logging_settings)
-
-patrick: Patrick = Patrick(logger, config)
-load_automod_regexes(patrick)
-
-
-@patrick.command(help="Sync slash commands")
-@is_admin()
-async def sync(ctx):
-    patrick.logger.info("Syncing slash commands")
-    commands_ = await patrick.tree.sync()
-    patrick.logger.info(f"Synced {len(commands_)} slash commands")
-    await reply(ctx, f"Synced {len(commands_)} slash commands")
-
-
-@patrick.command(help="Reloads all extensions and configs. Admin only.")
-@is_admin()
-async def reload(ctx):
-    await ctx.message.delete(delay=5)
-    m: discord.Message = await reply(ctx, "Reloading extensions...")
-    await patrick.reload_extensions()
-    await m.edit(content="Reloaded extensions")
-    await m.delete(delay=5)
-    m: discord.Message = await reply(ctx, "Reloading config...")
-    config_ = load_config()
-    patrick.config = config_
+# The render workers import this file as well, so only start the bot when it is run directly.
+if __name__ == "__main__":
+    config = load_config()
+
+    # Set up logging
+    logging_settings = config.get("logging", {})
+    logging_level = logging_settings.get("level", "INFO").upper()
+    if logging_level in ("DEBUG", "INFO", "WARN", "ERROR", "CRITICAL"):
+        logger = setup_logger("patrick", logging_level, logging_settings)
+    else:
+        print("Invalid logging level in config.yaml, defaulting to INFO")
+        logger = setup_logger("patrick", "INFO", logging_settings)
+
+    patrick: Patrick = Patrick(logger, config)
     load_automod_regexes(patrick)
-    await m.edit(content="Reloaded config")
-    await m.delete(delay=5)
 
 
-patrick.run(TOKEN, log_formatter=StreamLogFormatter(), log_level=logging_level)
+    @patrick.command(help="Sync slash commands")
+    @is_admin()
+    async def sync(ctx):
+        patrick.logger.info("Syncing slash commands")
+        commands_ = await patrick.tree.sync()
+        patrick.logger.info(f"Synced {len(commands_)} slash commands")
+        await reply(ctx, f"Synced {len(commands_)} slash commands")
+
+
+    @patrick.command(help="Reloads all extensions and configs. Admin only.")
+    @is_admin()
+    async def reload(ctx):
+        await ctx.message.delete(delay=5)
+        m: discord.Message = await reply(ctx, "Reloading extensions...")
+        await patrick.reload_extensions()
+        await m.edit(content="Reloaded extensions")
+        await m.delete(delay=5)
+        m: discord.Message = await reply(ctx, "Reloading config...")
+        config_ = load_config()
+        patrick.config = config_
+        load_automod_regexes(patrick)
+        await m.edit(content="Reloaded config")
+        await m.delete(delay=5)
+
+
+    patrick.run(TOKEN, log_formatter=StreamLogFormatter(), log_level=logging_level)
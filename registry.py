@@ -0,0 +1,73 @@
+from types import MappingProxyType
+from typing import NamedTuple, Optional
+
+from discord.ext import commands
+
+from suggest import SuggestionIndex
+from util import get_all_command_names
+
+
+class Registered(NamedTuple):
+    """The builtin commands at one point in time."""
+    # Every top level command once, in the order they were added
+    commands: tuple
+    # Every name and alias -> its command, like bot.all_commands
+    builtins: MappingProxyType
+    # Every name a custom command can't use: the names and aliases, and the group subcommands as "group subcommand"
+    reserved: frozenset
+
+
+class CommandRegistry:
+    """A snapshot of the builtin commands, shared by the dispatcher, the help command and /add, so they don't walk
+    every command, group and alias themselves. It is taken on first use after invalidate, which the bot calls when
+    a command is added or removed and when an extension is loaded or unloaded.
+    Users of the snapshot can tell it changed by its identity.
+    The names and aliases are also kept in a SuggestionIndex for "did you mean" suggestions, updated one command at a
+    time by added and removed.
+
+    Args:
+        bot (commands.Bot): The bot with the builtin commands.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.snapshot = None
+        self.suggestions = SuggestionIndex()
+
+    def invalidate(self):
+        self.snapshot = None
+
+    def added(self, command: commands.Command):
+        """Called by the bot after a command was added."""
+        self.invalidate()
+        for name in (command.name, *command.aliases):
+            self.suggestions.add(name)
+
+    def removed(self, name: str, command: Optional[commands.Command]):
+        """Called by the bot after the command or alias name was removed. command is what remove_command returned."""
+        self.invalidate()
+        if command is None:
+            return
+        # Removing an alias only removes that alias
+        names = (name,) if name in command.aliases else (command.name, *command.aliases)
+        for removed in names:
+            if removed not in self.bot.all_commands:
+                self.suggestions.remove(removed)
+
+    @property
+    def current(self) -> Registered:
+        if self.snapshot is None:
+            builtins = dict(self.bot.all_commands)
+            self.snapshot = Registered(
+                commands=tuple(dict.fromkeys(builtins.values())),
+                builtins=MappingProxyType(builtins),
+                reserved=frozenset(builtins).union(get_all_command_names(self.bot)),
+            )
+        return self.snapshot
+
+    def is_reserved(self, name: str) -> bool:
+        """Whether name belongs to a builtin command, so it can't be used as a custom command key."""
+        return name in self.current.reserved
+
+    def get(self, name: str) -> Optional[commands.Command]:
+        return self.current.builtins.get(name)
@@ -0,0 +1,167 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger("patrick.render_cache")
+
+
+class RenderCache:
+    """A two tier cache for encoded images. Keys are content addresses derived from everything that affects the output.
+    The first tier is an in memory LRU bounded by the total size of the stored images.
+    The second tier is a directory on disk, also bounded in size by removing the least recently written files.
+    The disk tier is best effort: errors reading or writing it are logged and treated as misses.
+    Concurrent requests for the same key share a single render.
+
+    Args:
+        max_bytes (int): The maximum total size of the images kept in memory.
+        directory (str): The directory for the disk tier. The disk tier is disabled when this is empty.
+        max_disk_bytes (int): The maximum total size of the images kept on disk.
+    """
+
+    def __init__(self, max_bytes: int, directory: str = "", max_disk_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.directory = Path(__file__).parent / directory if directory else None
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        # Renders that are currently running, by key. Later requests for the same key wait for these.
+        self.inflight = {}
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(kind: str, version: int, **params) -> str:
+        """Build a cache key from the renderer, its version and all of its parameters.
+
+        Args:
+            kind (str): The name of the renderer.
+            version (int): The version of the renderer. Bump it whenever the output for the same parameters changes.
+            **params: All parameters that affect the output, including the seed.
+
+        Returns:
+            str: A hex sha256 digest.
+        """
+        content = json.dumps({"kind": kind, "version": version, **params}, sort_keys=True)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get_memory(self, key: str):
+        data = self.memory.get(key)
+        if data is not None:
+            self.memory.move_to_end(key)
+        return data
+
+    def put_memory(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        if key in self.memory:
+            self.memory_bytes -= len(self.memory.pop(key))
+        self.memory[key] = data
+        self.memory_bytes += len(data)
+        while self.memory_bytes > self.max_bytes:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+
+    def read_disk(self, key: str):
+        if self.directory is None:
+            return None
+        try:
+            return (self.directory / key).read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Failed to read {key} from the render cache: {e}")
+            return None
+
+    def write_disk(self, key: str, data: bytes):
+        if self.directory is None or len(data) > self.max_disk_bytes:
+            return
+        # Write to a temporary file first so a crash never leaves a half written image behind.
+        temporary = self.directory / f"{key}.tmp"
+        try:
+            temporary.write_bytes(data)
+            os.replace(temporary, self.directory / key)
+        except OSError as e:
+            # A full disk or a permission problem shouldn't fail a render that succeeded.
+            logger.warning(f"Failed to write {key} to the render cache: {e}")
+            temporary.unlink(missing_ok=True)
+            return
+        self.prune_disk()
+
+    def prune_disk(self):
+        try:
+            files = []
+            for path in self.directory.iterdir():
+                if path.name.endswith(".tmp"):
+                    continue
+                try:
+                    files.append((path.stat(), path))
+                except FileNotFoundError:
+                    # Removed by a concurrent prune
+                    continue
+            total = sum(stat.st_size for stat, _ in files)
+            for stat, path in sorted(files, key=lambda file: file[0].st_mtime):
+                if total <= self.max_disk_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= stat.st_size
+        except OSError as e:
+            logger.warning(f"Failed to prune the render cache: {e}")
+
+    async def put(self, key: str, data: bytes):
+        self.put_memory(key, data)
+        await asyncio.to_thread(self.write_disk, key, data)
+
+    async def peek(self, key: str):
+        """Look a key up in memory, then on disk, without rendering. Disk hits are promoted to memory.
+
+        Returns:
+            bytes: The cached image, or None on a miss.
+        """
+        data = self.get_memory(key)
+        if data is None:
+            data = await asyncio.to_thread(self.read_disk, key)
+            if data is not None:
+                self.put_memory(key, data)
+        return data
+
+    async def get_or_render(self, key: str, render) -> bytes:
+        """Return the cached image for a key, or render and store it.
+        The render runs in its own task, so a cancelled request doesn't cancel the render for others waiting on it.
+        Failed renders are not cached.
+
+        Args:
+            key (str): The cache key, see RenderCache.key.
+            render (Callable[[], Awaitable[bytes]]): Produces the encoded image on a miss.
+
+        Returns:
+            bytes: The encoded image.
+        """
+        data = self.get_memory(key)
+        if data is not None:
+            return data
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.load_or_render(key, render))
+            self.inflight[key] = task
+            task.add_done_callback(lambda done: self.forget(key, done))
+        return await asyncio.shield(task)
+
+    def forget(self, key: str, task: asyncio.Task):
+        self.inflight.pop(key, None)
+        if not task.cancelled():
+            # Mark a failure as retrieved, in case every request waiting for it was cancelled.
+            task.exception()
+
+    async def load_or_render(self, key: str, render) -> bytes:
+        """Look the key up on disk, promoting hits to memory. Render and store the image on a miss."""
+        data = await asyncio.to_thread(self.read_disk, key)
+        if data is not None:
+            self.put_memory(key, data)
+            return data
+        data = await render()
+        await self.put(key, data)
+        return data
@@ -0,0 +1,425 @@
+import asyncio
+import heapq
+import multiprocessing
+from collections import deque
+from io import BytesIO
+from itertools import count
+from time import perf_counter, time
+from typing import NamedTuple, Optional
+
+import numpy as np
+from PIL import Image
+
+import animation
+import fractal
+import image_output
+import spirograph
+from fractal import RenderTimeout
+from image_output import ImageTooLarge
+from render_cache import RenderCache
+
+# How long a worker may overrun the deadline before its pool is killed.
+# Workers check the deadline themselves, so this only triggers when a task is stuck.
+KILL_GRACE = 2.0
+# Task priorities, lowest first. Preview tasks go ahead of every waiting task of a full render.
+PREVIEW = 0
+NORMAL = 1
+
+
+class RenderResult(NamedTuple):
+    """An encoded image. The timings are None when the image came from the cache."""
+    data: bytes
+    extension: str
+    render_seconds: Optional[float]
+    encode_seconds: Optional[float]
+
+
+def encode_fractal(family: str, rendered, width: int, height: int, output: dict) -> tuple:
+    """Worker task: assemble the rendered columns of a fractal and encode it. Returns (data, encode seconds)."""
+    return image_output.timed_encode(Image.fromarray(fractal.assemble(family, rendered, width, height), "RGB"), output)
+
+
+def render_spirograph(seed: str, width: int, height: int, length: int, output: dict, deadline: float) -> tuple:
+    """Worker task: render and encode a spirograph. Returns (data, render seconds, encode seconds)."""
+    start = perf_counter()
+    image = spirograph.spirograph(seed, width, height, length, deadline=deadline)
+    render_seconds = perf_counter() - start
+    data, encode_seconds = image_output.timed_encode(image, output)
+    return data, render_seconds, encode_seconds
+
+
+class Renderer:
+    """Runs the image renderers on a bounded pool of worker processes.
+    Fractals are split into bands of rows that are rendered in parallel, so a worker only holds one band at a time.
+
+    Images are encoded on the workers as well, in a format that fits the upload limit.
+    Finished images are stored in the given RenderCache, so repeated seeds aren't rendered again.
+
+    Tasks wait in a priority queue and only one task per worker is handed to the pool at a time, so a preview doesn't
+    end up behind all bands of a full render in the pool's own queue.
+
+    Every task gets a deadline. The render functions check it themselves and raise RenderTimeout once it passed.
+    If a task still hasn't returned shortly after the deadline, the pool running it is terminated so no core keeps
+    spinning. Only the render that timed out fails: the tasks of other renders are started again on a new pool.
+
+    Args:
+        cache (RenderCache): The cache for encoded images.
+        workers (int): The amount of worker processes.
+        max_renders (int): The amount of renders that may run at the same time. Others wait for a free slot.
+        tile_rows (int): The amount of rows per fractal band.
+        output (dict): The output settings for image_output.encode_to_fit.
+        lookup_table (bool): Colour fractals through a palette lookup table per seed, see fractal.smooth_colors.
+    """
+
+    def __init__(
+        self, cache: RenderCache, workers: int = 2, max_renders: int = 2, tile_rows: int = fractal.TILE_ROWS, output: dict = None,
+        lookup_table: bool = False
+    ):
+        self.cache = cache
+        self.output = output or {}
+        self.lookup_table = lookup_table
+        self.workers = workers
+        self.tile_rows = tile_rows
+        self.renders = asyncio.Semaphore(max_renders)
+        self.pool = None
+        # (priority, order, future, function, args) of every task that wasn't handed to the pool yet
+        self.queue = []
+        self.order = count()
+        # Tasks handed to the current pool that haven't returned
+        self.running = 0
+        # Future -> (pool, priority, function, args) of every task that is still running, to start it again when its
+        # pool is killed.
+        self.tasks = {}
+
+    def get_pool(self):
+        if self.pool is None:
+            # Spawned workers don't inherit the bot's threads and sockets.
+            context = multiprocessing.get_context("spawn")
+            self.pool = context.Pool(self.workers)
+        return self.pool
+
+    def submit(self, func, *args, priority: int = NORMAL) -> asyncio.Future:
+        """Queue a function to run on the pool and return an asyncio future for its result."""
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda done: self.tasks.pop(done, None))
+        self.enqueue(future, priority, func, args)
+        return future
+
+    def enqueue(self, future: asyncio.Future, priority: int, func, args: tuple):
+        heapq.heappush(self.queue, (priority, next(self.order), future, func, args))
+        self.start_next()
+
+    def start_next(self):
+        """Hand queued tasks to the pool until every worker has one. Cancelled tasks are dropped."""
+        while self.queue and self.running < self.workers:
+            priority, _, future, func, args = heapq.heappop(self.queue)
+            if not future.done():
+                self.start(future, priority, func, args)
+
+    def start(self, future: asyncio.Future, priority: int, func, args: tuple):
+        """Run a task on the current pool and resolve the future with its outcome."""
+        loop = future.get_loop()
+        pool = self.get_pool()
+        self.tasks[future] = (pool, priority, func, args)
+        self.running += 1
+
+        def resolve(outcome, error: bool):
+            if pool is not self.pool:
+                # The pool was killed, its tasks are queued again for a new pool.
+                return
+            self.running -= 1
+            self.start_next()
+            # Results of a task that was started again on a new pool are only used if they come from that pool.
+            if future.done() or self.tasks.get(future, (None,))[0] is not pool:
+                return
+            if error:
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+        pool.apply_async(
+            func,
+            args,
+            callback=lambda result: loop.call_soon_threadsafe(resolve, result, False),
+            error_callback=lambda exception: loop.call_soon_threadsafe(resolve, exception, True),
+        )
+
+    async def wait(self, futures, deadline: float) -> list:
+        """Wait for the futures until the deadline. Kills the pool running them if they take too long."""
+        done, stuck = await asyncio.wait(
+            futures, timeout=max(deadline - time() + KILL_GRACE, 0), return_when=asyncio.FIRST_EXCEPTION
+        )
+        for future in done:
+            if future.cancelled() or future.exception() is not None:
+                for other in stuck:
+                    other.cancel()
+                future.result()
+        if stuck:
+            await self.kill(stuck)
+            raise RenderTimeout()
+        return [future.result() for future in futures]
+
+    async def kill(self, stuck):
+        """Terminate the pools running the stuck tasks, without blocking the event loop, and queue the tasks of other
+        renders that were running on them again for a new pool."""
+        pools = {self.tasks[future][0] for future in stuck if future in self.tasks}
+        for future in stuck:
+            future.cancel()
+        for pool in pools:
+            if pool is self.pool:
+                self.pool = None
+                self.running = 0
+            await asyncio.to_thread(pool.terminate)
+            for future, (task_pool, priority, func, args) in list(self.tasks.items()):
+                if task_pool is pool and not future.done():
+                    del self.tasks[future]
+                    self.enqueue(future, priority, func, args)
+
+    def close(self):
+        """Kill all workers and fail every task that was still running."""
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+        self.running = 0
+        queued = [future for _, _, future, _, _ in self.queue]
+        self.queue.clear()
+        for future in queued + list(self.tasks):
+            if not future.done():
+                future.set_exception(RenderTimeout())
+
+    async def acquire(self, deadline: float):
+        try:
+            await asyncio.wait_for(self.renders.acquire(), timeout=max(deadline - time(), 0))
+        except asyncio.TimeoutError:
+            raise RenderTimeout()
+
+    async def render_fractal(
+        self, seed: str, size: int, max_iterations: int, messiness: int, zoom: float, family: str, timeout: float,
+        priority: int = NORMAL
+    ) -> tuple:
+        """Render fractal.fractal in parallel bands and encode it. The image is identical to fractal.fractal.
+        Its tasks are queued with the given priority, PREVIEW renders don't wait for a render slot.
+
+        Raises:
+            RenderTimeout: When the render didn't finish within the timeout.
+            ImageTooLarge: When the image doesn't fit the upload limit.
+
+        Returns:
+            tuple: (data, render seconds, encode seconds)
+        """
+        deadline = time() + timeout
+        # Previews are small and come with a full render that takes a slot.
+        slot = priority != PREVIEW
+        if slot:
+            await self.acquire(deadline)
+        try:
+            start = perf_counter()
+            params = (
+                await self.wait([self.submit(fractal.fractal_params, seed, messiness, family, priority=priority)], deadline)
+            )[0]
+            bands = [
+                (row_start, min(row_start + self.tile_rows, size))
+                for row_start in range(0, size, self.tile_rows)
+            ]
+            tiles = await self.wait(
+                [
+                    self.submit(
+                        fractal.render_tile, family, params, size, size, max_iterations, zoom, row_start, row_stop,
+                        deadline, self.lookup_table, priority=priority,
+                    )
+                    for row_start, row_stop in bands
+                ],
+                deadline,
+            )
+            rendered = np.empty((size, fractal.columns(family, size), 3), dtype=np.uint8)
+            for (row_start, row_stop), tile in zip(bands, tiles):
+                rendered[row_start:row_stop] = tile
+            render_seconds = perf_counter() - start
+            data, encode_seconds = (
+                await self.wait(
+                    [self.submit(encode_fractal, family, rendered, size, size, self.output, priority=priority)], deadline
+                )
+            )[0]
+        finally:
+            if slot:
+                self.renders.release()
+        return data, render_seconds, encode_seconds
+
+    async def render_spirograph(self, seed: str, width: int, height: int, length: int, timeout: float) -> tuple:
+        """Render spirograph.spirograph on the pool and encode it.
+
+        Raises:
+            RenderTimeout: When the render didn't finish within the timeout.
+            ImageTooLarge: When the image doesn't fit the upload limit.
+
+        Returns:
+            tuple: (data, render seconds, encode seconds)
+        """
+        deadline = time() + timeout
+        await self.acquire(deadline)
+        try:
+            data, render_seconds, encode_seconds = (
+                await self.wait(
+                    [self.submit(render_spirograph, seed, width, height, length, self.output, deadline)], deadline
+                )
+            )[0]
+        finally:
+            self.renders.release()
+        return data, render_seconds, encode_seconds
+
+    async def render_animation(self, frames: list, fmt: str, width: int, height: int, delay: int, timeout: float) -> tuple:
+        """Render animation frames on the pool and stream them into a gif or apng as they come in.
+        Only a few frames are rendered ahead, so memory doesn't grow with the amount of frames.
+
+        Args:
+            frames (list): A (worker function, args) pair per frame. The deadline is appended to the args.
+            fmt (str): One of animation.FORMATS.
+            width (int): The frame width.
+            height (int): The frame height.
+            delay (int): The time per frame in milliseconds.
+            timeout (float): Seconds until the render is aborted.
+
+        Raises:
+            RenderTimeout: When the render didn't finish within the timeout.
+            ImageTooLarge: When the animation grows past the upload limit.
+
+        Returns:
+            tuple: (data, render seconds, encode seconds)
+        """
+        deadline = time() + timeout
+        max_bytes = self.output.get("maxUploadBytes", image_output.DEFAULT_MAX_BYTES)
+        await self.acquire(deadline)
+        running = deque()
+        try:
+            start = perf_counter()
+            encode_seconds = 0.0
+            with BytesIO() as output:
+                writer = animation.WRITERS[fmt](output, width, height, len(frames), delay)
+
+                async def write_next():
+                    nonlocal encode_seconds
+                    frame = (await self.wait([running.popleft()], deadline))[0]
+                    encode_start = perf_counter()
+                    writer.add(frame)
+                    encode_seconds += perf_counter() - encode_start
+                    if output.tell() > max_bytes:
+                        raise ImageTooLarge()
+
+                for func, args in frames:
+                    running.append(self.submit(func, *args, deadline))
+                    if len(running) >= self.workers * 2:
+                        await write_next()
+                while running:
+                    await write_next()
+                writer.close()
+                data = output.getvalue()
+        finally:
+            for future in running:
+                future.cancel()
+            self.renders.release()
+        return data, perf_counter() - start - encode_seconds, encode_seconds
+
+    async def cached(self, key: str, render) -> RenderResult:
+        """Get an image from the cache, or render it with the given coroutine function."""
+        timings = {}
+
+        async def render_and_time():
+            data, timings["render"], timings["encode"] = await render()
+            return data
+
+        data = await self.cache.get_or_render(key, render_and_time)
+        return RenderResult(data, image_output.extension(data), timings.get("render"), timings.get("encode"))
+
+    def fractal_key(self, seed: str, size: int, max_iterations: int, messiness: int, zoom: float, family: str) -> str:
+        return RenderCache.key(
+            "fractal",
+            fractal.VERSION,
+            family=family,
+            seed=seed,
+            size=size,
+            max_iterations=max_iterations,
+            messiness=messiness,
+            zoom=zoom,
+            lookup_table=self.lookup_table,
+            output=self.output,
+        )
+
+    async def cached_fractal(self, seed: str, size: int, max_iterations: int, messiness: int, zoom: float, family: str):
+        """Get a fractal from the cache without rendering it.
+
+        Returns:
+            RenderResult: The cached fractal, or None if it isn't cached.
+        """
+        data = await self.cache.peek(self.fractal_key(seed, size, max_iterations, messiness, zoom, family))
+        if data is None:
+            return None
+        return RenderResult(data, image_output.extension(data), None, None)
+
+    async def fractal_image(
+        self, seed: str, size: int, max_iterations: int, messiness: int, zoom: float, family: str, timeout: float,
+        priority: int = NORMAL
+    ) -> RenderResult:
+        """Get a fractal from the cache, or render it. See render_fractal."""
+        return await self.cached(
+            self.fractal_key(seed, size, max_iterations, messiness, zoom, family),
+            lambda: self.render_fractal(seed, size, max_iterations, messiness, zoom, family, timeout, priority),
+        )
+
+    async def spirograph_image(self, seed: str, width: int, height: int, length: int, timeout: float) -> RenderResult:
+        """Get a spirograph from the cache, or render it. See render_spirograph."""
+        key = RenderCache.key(
+            "spirograph", spirograph.VERSION, seed=seed, width=width, height=height, length=length, output=self.output
+        )
+        return await self.cached(key, lambda: self.render_spirograph(seed, width, height, length, timeout))
+
+    async def fractal_animation(
+        self, seed: str, size: int, max_iterations: int, messiness: int, zoom: float, zoom_factor: float, family: str,
+        frames: int, fmt: str, delay: int, timeout: float
+    ) -> RenderResult:
+        """Get a zoom into a fractal from the cache, or render it. Each frame zooms in by zoom_factor. See render_animation."""
+        key = RenderCache.key(
+            "fractal-animation",
+            animation.VERSION,
+            fractal_version=fractal.VERSION,
+            family=family,
+            seed=seed,
+            size=size,
+            max_iterations=max_iterations,
+            messiness=messiness,
+            zoom=zoom,
+            zoom_factor=zoom_factor,
+            lookup_table=self.lookup_table,
+            frames=frames,
+            format=fmt,
+            delay=delay,
+        )
+        tasks = [
+            (
+                animation.fractal_frame,
+                (seed, size, max_iterations, messiness, zoom * zoom_factor**frame, family, self.lookup_table, fmt),
+            )
+            for frame in range(frames)
+        ]
+        return await self.cached(key, lambda: self.render_animation(tasks, fmt, size, size, delay, timeout))
+
+    async def spirograph_animation(
+        self, seed: str, width: int, height: int, length: int, frames: int, fmt: str, delay: int, timeout: float
+    ) -> RenderResult:
+        """Get a spirograph drawing itself from the cache, or render it. See render_animation."""
+        key = RenderCache.key(
+            "spirograph-animation",
+            animation.VERSION,
+            spirograph_version=spirograph.VERSION,
+            seed=seed,
+            width=width,
+            height=height,
+            length=length,
+            frames=frames,
+            format=fmt,
+            delay=delay,
+        )
+        tasks = [
+            (animation.spirograph_frame, (seed, width, height, length, (frame + 1) / frames, fmt))
+            for frame in range(frames)
+        ]
+        return await self.cached(key, lambda: self.render_animation(tasks, fmt, width, height, delay, timeout))
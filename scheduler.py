@@ -0,0 +1,102 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timezone
+from time import time
+from typing import Awaitable, Callable, Hashable
+
+logger = logging.getLogger("patrick.scheduler")
+
+# Longest single sleep in seconds, so a jump of the wall clock delays nothing by more than this.
+MAX_SLEEP = 600
+
+
+def as_timestamp(deadline) -> float:
+    """Seconds since the epoch of a datetime or a timestamp. Naive datetimes are taken as UTC, like the database stores them."""
+    if isinstance(deadline, datetime):
+        if deadline.tzinfo is None:
+            deadline = deadline.replace(tzinfo=timezone.utc)
+        return deadline.timestamp()
+    return deadline
+
+
+class DeadlineScheduler:
+    """Calls back when scheduled items become due, sleeping exactly until the earliest deadline instead of polling.
+    Deadlines are kept in a min-heap. Scheduling something earlier than everything else wakes the task up early.
+    Items that are due at the same time are handed to the callback together.
+
+    Args:
+        name (str): Used in log messages.
+        callback (Callable): Coroutine function called with the list of keys that are due.
+    """
+
+    def __init__(self, name: str, callback: Callable[[list], Awaitable]):
+        self.name = name
+        self.callback = callback
+        # (deadline, key) pairs. Cancelled and rescheduled keys stay in the heap until they come up, see self.deadlines.
+        self.heap = []
+        # The current deadline of every scheduled key
+        self.deadlines = {}
+        self.wakeup = asyncio.Event()
+        self.task = None
+
+    def __len__(self):
+        return len(self.deadlines)
+
+    def schedule(self, key: Hashable, deadline):
+        """Schedule a key, or move it to a new deadline.
+
+        Args:
+            key (Hashable): The item, usually a rowid. Keys have to be comparable with each other.
+            deadline (datetime | float): When the item is due, as a datetime or a timestamp.
+        """
+        deadline = as_timestamp(deadline)
+        self.deadlines[key] = deadline
+        heapq.heappush(self.heap, (deadline, key))
+        if self.heap[0] == (deadline, key):
+            self.wakeup.set()
+
+    def cancel(self, key: Hashable) -> bool:
+        """Unschedule a key.
+
+        Returns:
+            bool: Whether the key was scheduled.
+        """
+        return self.deadlines.pop(key, None) is not None
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def pop_due(self, now: float) -> list:
+        """Remove and return the keys that are due, skipping the stale entries of cancelled and rescheduled keys."""
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            deadline, key = heapq.heappop(self.heap)
+            if self.deadlines.get(key) == deadline:
+                del self.deadlines[key]
+                due.append(key)
+        return due
+
+    async def run(self):
+        while True:
+            self.wakeup.clear()
+            due = self.pop_due(time())
+            if due:
+                try:
+                    await self.callback(due)
+                except Exception:
+                    logger.exception(f"The {self.name} scheduler failed to handle {len(due)} items")
+                continue
+            if not self.heap:
+                await self.wakeup.wait()
+                continue
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=min(self.heap[0][0] - time(), MAX_SLEEP))
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,181 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from time import monotonic
+
+# Discord shows at most 25 autocomplete choices
+LIMIT = 25
+# Length of the n-grams in the substring index. Shorter queries search the ranked text instead.
+GRAM = 2
+# Candidate pools up to this size are ranked directly. Larger ones are searched in the ranked text, where they are dense.
+RANK_DIRECTLY = 2000
+# Seconds the ranking may lag behind the usage counts
+RERANK_INTERVAL = 60
+# Separates the keys in the ranked text. Keys can't contain it, they are single line slash command arguments.
+SEPARATOR = "\n"
+
+
+def grams(text: str) -> set:
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class SearchIndex:
+    """An index over the custom command keys and responses for autocomplete, instead of lowercasing and testing every
+    key on every keystroke. Matches are ranked by prefix matches first, then by how often the command was used,
+    then alphabetically.
+    Keys that start with the query are found in a sorted list, keys that contain it through an index of bigrams.
+    Large sets of matches are instead searched for in the ranked text: all lowercase keys joined from most to least
+    used, so the first matches found are the best ones.
+    The index is kept up to date with add, remove and used. The ranking is redone on the next search after the keys
+    changed, and at most every RERANK_INTERVAL seconds for changed usage counts.
+    """
+
+    def __init__(self):
+        # Every key and its lowercase version
+        self.keys = {}
+        # (lowercase key, key) pairs in order, for the prefix search
+        self.sorted = []
+        # Bigram -> the keys containing it
+        self.index = defaultdict(set)
+        self.uses = defaultdict(int)
+        # The keys from most to least used, the rank of every key, their lowercase versions joined by SEPARATOR
+        # and where each of them starts in there
+        self.ranking = []
+        self.ranks = {}
+        self.text = SEPARATOR
+        self.starts = []
+        self.ranked_at = None
+        # Key -> (lowercase response, response) pairs
+        self.responses = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def load(self, commands: dict, uses: dict):
+        """Index all custom commands at once, into an empty index.
+
+        Args:
+            commands (dict): The keys and their responses.
+            uses (dict): How often each key was used.
+        """
+        self.uses.update(uses)
+        for key, responses in commands.items():
+            self.add(key, responses, sort=False)
+        self.sorted.sort()
+
+    def add(self, key: str, responses: tuple, sort: bool = True):
+        """Add a key, or update its responses."""
+        self.responses[key] = tuple((response.lower(), response) for response in responses)
+        if key in self.keys:
+            return
+        lowered = key.lower().replace(SEPARATOR, " ")
+        self.keys[key] = lowered
+        for gram in grams(lowered):
+            self.index[gram].add(key)
+        if sort:
+            self.sorted.insert(bisect_left(self.sorted, (lowered, key)), (lowered, key))
+        else:
+            self.sorted.append((lowered, key))
+        self.ranked_at = None
+
+    def remove(self, key: str):
+        lowered = self.keys.pop(key, None)
+        if lowered is None:
+            return
+        del self.responses[key]
+        for gram in grams(lowered):
+            self.index[gram].discard(key)
+            if not self.index[gram]:
+                del self.index[gram]
+        del self.sorted[bisect_left(self.sorted, (lowered, key))]
+        self.ranked_at = None
+
+    def used(self, key: str):
+        """Count a use of a key for the ranking."""
+        if key in self.keys:
+            self.uses[key] += 1
+
+    def rank(self):
+        """Redo the ranking when the keys changed, or when the usage counts haven't been looked at for a while."""
+        if self.ranked_at is not None and monotonic() - self.ranked_at < RERANK_INTERVAL:
+            return
+        uses = self.uses
+        self.ranking = sorted(self.keys, key=lambda key: (-uses[key], key))
+        self.ranks = {key: rank for rank, key in enumerate(self.ranking)}
+        self.starts = []
+        position = len(SEPARATOR)
+        for key in self.ranking:
+            self.starts.append(position)
+            position += len(self.keys[key]) + len(SEPARATOR)
+        self.text = SEPARATOR + SEPARATOR.join(self.keys[key] for key in self.ranking) + SEPARATOR
+        self.ranked_at = monotonic()
+
+    def find(self, query: str, limit: int, skip: set, prefix: bool) -> list:
+        """The ranks of the first keys in the ranked text that contain, or start with, the query. Ranks in skip are left out."""
+        text, starts = self.text, self.starts
+        # A prefix match is the separator in front of the key followed by the query
+        needle, offset = (SEPARATOR + query, len(SEPARATOR)) if prefix else (query, 0)
+        found = []
+        position = text.find(needle)
+        while position != -1 and len(found) < limit:
+            rank = bisect_right(starts, position + offset) - 1
+            if rank not in skip:
+                found.append(rank)
+            # Every key counts once, so continue with the next one
+            following = starts[rank + 1] if rank + 1 < len(starts) else len(text)
+            position = text.find(needle, following - offset)
+        return found
+
+    def search(self, query: str, limit: int = LIMIT) -> list:
+        """Find the keys that contain the query, ignoring case.
+
+        Args:
+            query (str): What was typed so far.
+            limit (int): The maximum amount of keys to return.
+
+        Returns:
+            list: The keys that start with the query, then the other keys that contain it, both from most to least used.
+        """
+        self.rank()
+        query = query.lower().replace(SEPARATOR, " ")
+        if not query:
+            return self.ranking[:limit]
+        ranks = self.ranks
+
+        start = bisect_left(self.sorted, (query,))
+        end = bisect_left(self.sorted, (query + "\U0010ffff",))
+        if end - start <= RANK_DIRECTLY:
+            found = heapq.nsmallest(limit, (ranks[key] for _, key in self.sorted[start:end]))
+        else:
+            found = self.find(query, limit, set(), prefix=True)
+        if len(found) < limit:
+            skip = set(found)
+            pool = None
+            if len(query) >= GRAM:
+                postings = sorted((self.index.get(gram, ()) for gram in grams(query)), key=len)
+                # The matches are among the keys with the rarest bigram. If those are many, the matches are likely dense.
+                if len(postings[0]) <= RANK_DIRECTLY:
+                    pool = set(postings[0]).intersection(*postings[1:])
+            if pool is not None:
+                keys = self.keys
+                found += heapq.nsmallest(
+                    limit - len(found),
+                    (ranks[key] for key in pool if query in keys[key] and ranks[key] not in skip),
+                )
+            else:
+                found += self.find(query, limit - len(found), skip, prefix=False)
+        return [self.ranking[rank] for rank in found]
+
+    def search_responses(self, key: str, query: str, limit: int = LIMIT) -> list:
+        """Find the responses of a key that contain the query, ignoring case. Responses that start with it come first.
+
+        Returns:
+            list: The matching responses, in the order they were added otherwise.
+        """
+        query = query.lower()
+        responses = self.responses.get(key, ())
+        prefixed = [response for lowered, response in responses if lowered.startswith(query)]
+        if len(prefixed) >= limit:
+            return prefixed[:limit]
+        others = [response for lowered, response in responses if query in lowered and not lowered.startswith(query)]
+        return (prefixed + others)[:limit]
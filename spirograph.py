@@ -1,26 +1,48 @@
 import hashlib
+from math import ceil
 from random import Random
-from math import sin, cos, ceil
+
+from time import time
 
 from PIL import Image
-from numpy import array
+import numpy as np
+
+import palette
+from fractal import RenderTimeout
+
+# Bump this whenever the output for the same parameters changes. Part of the render cache key.
+VERSION = 1
 
 def generate_spirograph_points(R, r, p, length):
-    a = 0.0 # angle parameter (aka steps)
-    points = []
-    while a < length:
-        x = (R - r) * cos(a) + p * cos(((R - r) / r) * a) # x coordinate
-        y = (R - r) * sin(a) - p * sin(((R - r) / r) * a) # y coordinate
-        points.append((x, y))
-        a += 0.01 # This can be adjusted for a more or less detailed spirograph. Smaller values yield more points.
-    return points
+    """Generate the curve, one point per 0.01 radians from 0 up to length.
+
+    Returns:
+        tuple: (x, y) arrays of coordinates.
+    """
+    # The angle parameter (aka steps). Summed in sequence, so the angles are the same as adding 0.01 in a loop.
+    # Ends at the first angle that reaches length.
+    steps = np.full(int(length * 100) + 3, 0.01) # This can be adjusted for a more or less detailed spirograph. Smaller values yield more points.
+    steps[0] = 0.0
+    a = np.add.accumulate(steps)
+    while a[-1] < length:
+        # The rounding of the sum can fall short on very long curves. Continue from the last angle.
+        steps[0] = a[-1]
+        a = np.concatenate((a[:-1], np.add.accumulate(steps[:len(steps) // 100 + 3])))
+    a = a[:np.searchsorted(a, length)]
+    x = (R - r) * np.cos(a) + p * np.cos(((R - r) / r) * a) # x coordinates
+    y = (R - r) * np.sin(a) - p * np.sin(((R - r) / r) * a) # y coordinates
+    return x, y
 
 def scale_points(points, width, height):
+    """Scale the curve to the image and drop the points too close to the border to draw.
+
+    Returns:
+        tuple: (x, y, distance) arrays, with integer pixel coordinates and the distance to the center.
+    """
+    x, y = points
     # Calculate min and max for x and y
-    min_x = min(point[0] for point in points)
-    max_x = max(point[0] for point in points)
-    min_y = min(point[1] for point in points)
-    max_y = max(point[1] for point in points)
+    min_x, max_x = float(x.min()), float(x.max())
+    min_y, max_y = float(y.min()), float(y.max())
 
     # Calculate scaling factors based on the image dimensions and the range of x and y
     # This is done by taking the available width and height (minus some padding) and dividing by the range
@@ -29,14 +51,45 @@ def scale_points(points, width, height):
 
     # Center of the image. Used for distance calculation.
     middle = (width//2, height//2)
-    scaled_points = []
-    for point in points:
-        x = int((point[0] - min_x) * scale_x) + 10 # Take X value, padding correction, apply scale and readd padding
-        y = int((point[1] - min_y) * scale_y) + 10 # Take Y value, padding correction, apply scale and readd padding
-        distance = ((x - middle[0])**2 + (y - middle[1])**2)**0.5 # pythagorean distance from center
-        if 2 <= x < width-2 and 2 <= y < height-2: # Ensure point is within bounds for drawing
-            scaled_points.append((x, y, distance))
-    return scaled_points
+    x = ((x - min_x) * scale_x).astype(np.int64) + 10 # Take X value, padding correction, apply scale and readd padding
+    y = ((y - min_y) * scale_y).astype(np.int64) + 10 # Take Y value, padding correction, apply scale and readd padding
+    inside = (2 <= x) & (x < width-2) & (2 <= y) & (y < height-2) # Ensure point is within bounds for drawing
+    x, y = x[inside], y[inside]
+    # Pythagorean distance from center. There are few distinct squared distances, and taking their root with ** keeps
+    # the rounding of the original, which np.sqrt doesn't always match.
+    squared, inverse = np.unique((x - middle[0])**2 + (y - middle[1])**2, return_inverse=True)
+    distance = np.array([value**0.5 for value in squared.tolist()])[inverse]
+    return x, y, distance
+
+def check_deadline(deadline):
+    if deadline is not None and time() > deadline:
+        raise RenderTimeout()
+
+def stamp(img_array, x, y, point_colors, deadline=None):
+    """Draw a 4x4 block per point, covering x-2 to x+1 and y-2 to y+1. Later points are drawn over earlier ones.
+
+    Args:
+        img_array (np.ndarray): The (width, height, 3) image buffer.
+        x (np.ndarray): The x coordinates, at least 2 away from the border.
+        y (np.ndarray): The y coordinates, at least 2 away from the border.
+        point_colors (np.ndarray): The (n, 3) colour per point.
+        deadline (float, optional): A time.time() timestamp after which a RenderTimeout is raised.
+    """
+    width, height = img_array.shape[:2]
+    # The last point drawn at each position. Reversed, so unique finds the last occurrence instead of the first.
+    last = np.full((width, height), -1, dtype=np.int64)
+    positions, first = np.unique((x * height + y)[::-1], return_index=True)
+    last.flat[positions] = len(x) - 1 - first
+    # Every pixel shows the last point whose block covers it.
+    winner = np.full((width, height), -1, dtype=np.int64)
+    center = last[2:width-2, 2:height-2]
+    for dx in range(-2, 2):
+        check_deadline(deadline)
+        for dy in range(-2, 2):
+            covered = winner[2+dx:width-2+dx, 2+dy:height-2+dy]
+            np.maximum(covered, center, out=covered)
+    drawn = winner >= 0
+    img_array[drawn] = point_colors[winner[drawn]]
 
 def sha256_lower_long(str):
     acc = 0
@@ -44,7 +97,8 @@ def sha256_lower_long(str):
         acc = (acc << 8) | (byte & 0xFF)
     return acc
 
-def spirograph(seed: str, width: int, height: int, length: int) -> Image.Image:
+def spirograph(seed: str, width: int, height: int, length: int, progress: float = 1.0, deadline=None) -> Image.Image:
+    """Draw the spirograph of a seed. The deadline is checked between the steps, a RenderTimeout is raised once it passed."""
     rng = Random(sha256_lower_long(seed))
     line_color_start = (
         rng.randint(0, 255),
@@ -56,27 +110,24 @@ def spirograph(seed: str, width: int, height: int, length: int) -> Image.Image:
         rng.randint(0, 255),
         rng.randint(0, 255),
     )
-    colors = []
-    for i in range(100):
-        ratio = i / 99
-        r = int(line_color_start[0] * (1 - ratio) + line_color_end[0] * ratio)
-        g = int(line_color_start[1] * (1 - ratio) + line_color_end[1] * ratio)
-        b = int(line_color_start[2] * (1 - ratio) + line_color_end[2] * ratio)
-        colors.append((r, g, b))
-    img_array = array(
-        [[(0, 0, 0) for _ in range(height)] for _ in range(width)], dtype="uint8"
-    )
+    colors = palette.gradient(line_color_start, line_color_end, 100)
+    img_array = np.zeros((width, height, 3), dtype="uint8")
     R = rng.randint(50, 150)
     r = rng.randint(10, 50)
     p = rng.randint(10, 50)
+    check_deadline(deadline)
     points = generate_spirograph_points(R, r, p, length)
-    scaled_points = scale_points(points, width, height)
-    min_distance = min(point[2] for point in scaled_points)
-    max_distance = max(point[2] for point in scaled_points)
+    check_deadline(deadline)
+    x, y, distances = scale_points(points, width, height)
+    check_deadline(deadline)
+    min_distance = float(distances.min())
+    max_distance = float(distances.max())
     scale_distance = 99 / (max_distance - min_distance) # Scaling between 0 and 99 for color indexing
-    for point in scaled_points:
-        x = point[0]
-        y = point[1]
-        color = ceil((point[2] - min_distance) * scale_distance) - 1 # -1 to convert to 0-99 index. Ceil and then -1 ensures max_distance maps to 99
-        img_array[x-2:x+2, y-2:y+2] = colors[color]
+    # -1 to convert to 0-99 index. Ceil and then -1 ensures max_distance maps to 99. min_distance maps to -1, the last colour.
+    point_colors = colors[np.ceil((distances - min_distance) * scale_distance).astype(np.int64) - 1]
+    if progress < 1.0:
+        # Only draw the start of the curve. The colours are still scaled over the whole curve, so it draws towards the full image.
+        drawn = ceil(len(x) * progress)
+        x, y, point_colors = x[:drawn], y[:drawn], point_colors[:drawn]
+    stamp(img_array, x, y, point_colors, deadline)
     return Image.fromarray(img_array, "RGB")
@@ -0,0 +1,142 @@
+from collections import defaultdict
+from itertools import combinations
+
+# Edits a name may be away from what was typed to be suggested
+MAX_DISTANCE = 2
+# Only the start of a name is indexed. This keeps the amount of deletions per name small for long custom keys,
+# the full names are compared afterwards.
+PREFIX_LENGTH = 10
+SUGGESTIONS = 3
+# Recent lookups kept per index, so a typo that is repeated is answered right away
+CACHE_SIZE = 256
+
+
+def deletions(word: str) -> set:
+    """The word and every string made by removing one or two characters from it, for a MAX_DISTANCE of 2."""
+    found = {word}
+    found.update(word[:i] + word[i + 1:] for i in range(len(word)))
+    found.update(word[:i] + word[i + 1:j] + word[j + 1:] for i, j in combinations(range(len(word)), 2))
+    return found
+
+
+def edit_distance(a: str, b: str, limit: int = MAX_DISTANCE) -> int:
+    """The optimal string alignment distance between a and b: insertions, deletions, substitutions and swaps of
+    adjacent characters. Computed a column of the distance matrix at a time in the bits of an integer (Hyyrö's
+    bit-vector algorithm), after dropping the start and end the strings share.
+
+    Returns:
+        int: The distance, or limit + 1 if it is larger than limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    # The shared start and end cost nothing
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if not a or not b:
+        return min(len(a) + len(b), limit + 1)
+    # Where every character occurs in a
+    positions = {}
+    for i, char in enumerate(a):
+        positions[char] = positions.get(char, 0) | 1 << i
+    mask = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    # The vertical differences of the current column, +1 and -1, and the distance in its last row
+    plus, minus, distance = mask, 0, len(a)
+    diagonal = previous = 0
+    for char in b:
+        matches = positions.get(char, 0)
+        swapped = ((~diagonal & matches) << 1) & previous
+        diagonal = ((((matches & plus) + plus) ^ plus) | matches | minus | swapped) & mask
+        horizontal_plus = minus | (~(diagonal | plus) & mask)
+        horizontal_minus = plus & diagonal
+        if horizontal_plus & last:
+            distance += 1
+        elif horizontal_minus & last:
+            distance -= 1
+        horizontal_plus = ((horizontal_plus << 1) | 1) & mask
+        horizontal_minus = (horizontal_minus << 1) & mask
+        plus = horizontal_minus | (~(diagonal | horizontal_plus) & mask)
+        minus = horizontal_plus & diagonal
+        previous = matches
+    return min(distance, limit + 1)
+
+
+class SuggestionIndex:
+    """Finds the names closest to a mistyped command, without comparing it to every name.
+    Every name is stored under the strings made by deleting up to MAX_DISTANCE characters from its start, so a
+    lookup only has to compare the names that share a deletion with what was typed (a symmetric deletion dictionary).
+    Names are compared ignoring case. They can be added and removed one at a time, which clears the recent lookups.
+    """
+
+    def __init__(self):
+        # Every name, as added
+        self.names = set()
+        # Lowercase name -> the names with it
+        self.lowered = defaultdict(set)
+        # Deletion -> the lowercase names that have it
+        self.deletions = defaultdict(set)
+        # Word -> its matches, for the last CACHE_SIZE words looked up
+        self.cache = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name: str):
+        if name in self.names:
+            return
+        self.names.add(name)
+        self.cache.clear()
+        lowered = name.lower()
+        if not self.lowered[lowered]:
+            for deletion in deletions(lowered[:PREFIX_LENGTH]):
+                self.deletions[deletion].add(lowered)
+        self.lowered[lowered].add(name)
+
+    def remove(self, name: str):
+        if name not in self.names:
+            return
+        self.names.discard(name)
+        self.cache.clear()
+        lowered = name.lower()
+        self.lowered[lowered].discard(name)
+        if self.lowered[lowered]:
+            return
+        del self.lowered[lowered]
+        for deletion in deletions(lowered[:PREFIX_LENGTH]):
+            self.deletions[deletion].discard(lowered)
+            if not self.deletions[deletion]:
+                del self.deletions[deletion]
+
+    def matches(self, word: str) -> list:
+        """Every name within MAX_DISTANCE edits of word.
+
+        Returns:
+            list: (distance, name) pairs.
+        """
+        word = word.lower()
+        found = self.cache.get(word)
+        if found is not None:
+            return found
+        candidates = set()
+        for deletion in deletions(word[:PREFIX_LENGTH]):
+            names = self.deletions.get(deletion)
+            if names:
+                candidates |= names
+        found = []
+        for candidate in candidates:
+            distance = edit_distance(word, candidate)
+            if distance <= MAX_DISTANCE:
+                found.extend((distance, name) for name in self.lowered[candidate])
+        if len(self.cache) >= CACHE_SIZE:
+            del self.cache[next(iter(self.cache))]
+        self.cache[word] = found
+        return found
+
+    def suggest(self, word: str, limit: int = SUGGESTIONS) -> list:
+        """The names closest to word, closest first and alphabetically otherwise."""
+        return [name for _, name in sorted(self.matches(word))[:limit]]
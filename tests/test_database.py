@@ -0,0 +1,14 @@
+import asyncio
+
+import database
+
+
+def test_indexed_queries_use_indexes():
+    assert asyncio.run(database.find_table_scans()) == []
+
+
+def test_is_table_scan():
+    assert database.is_table_scan("SCAN command_responses")
+    assert not database.is_table_scan("SCAN command_history USING COVERING INDEX command_history_command_timestamp")
+    assert not database.is_table_scan("SEARCH command_responses USING INDEX command_responses_id (id=?)")
+    assert not database.is_table_scan("USE TEMP B-TREE FOR ORDER BY")
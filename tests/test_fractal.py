@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+
+import fractal
+
+
+@pytest.mark.parametrize("family", list(fractal.KERNELS))
+def test_families_render_more_than_one_colour(family):
+    for seed in ("patrick", "fractal", "1234"):
+        image = fractal.fractal(seed, 64, 64, 200, 50, 2.0, family)
+        assert len(image.getcolors(64 * 64)) > 1
+
+
+def test_lookup_table_is_at_most_a_shade_off():
+    exact = fractal.fractal("patrick", 64, 64, 200, 50, 2.0)
+    table = fractal.fractal("patrick", 64, 64, 200, 50, 2.0, lookup_table=True)
+    difference = np.abs(np.asarray(exact, dtype=np.int64) - np.asarray(table, dtype=np.int64))
+    assert difference.max() <= 1
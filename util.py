@@ -60,31 +60,24 @@ def reformat_relay_chat(bot, message) -> typing.Optional[discord.Message]:
     return None
 
 
-async def process_custom_command(bot, message) -> bool:
-    """Take a message and check if it is a custom command. If it is, send a random response from the list of responses.
-    If the command is not found, return False.
+async def process_custom_command(bot, message, key) -> bool:
+    """Send a random response of a custom command. If the command is not found, return False.
 
     Args:
         bot (commands.Bot): The bot instance.
-        message (discord.Message): The message to check for a custom command.
+        message (discord.Message): The message that ran the custom command.
+        key (str): The custom command, as resolved by the dispatcher.
 
     Returns:
         bool: True if the command was found and processed, False otherwise.
     """
-    commands = bot.database.commands_cache
-    for prefix in bot.command_prefix:
-        if message.content.removeprefix(prefix) in commands:
-            bot.logger.info(
-                f"User '{message.author.display_name}' ran custom command '{message.content[1:]}'"
-            )
-            await message.channel.send(
-                f"{message.author.display_name}: {choice(commands[message.content.removeprefix(prefix)])}"
-            )
-            await bot.database.add_command_history(
-                message.author.display_name, message.content.removeprefix(prefix)
-            )
-            return True
-    return False
+    responses = bot.database.commands_cache.get(key)
+    if responses is None:
+        return False
+    bot.logger.info(f"User '{message.author.display_name}' ran custom command '{key}'")
+    await message.channel.send(f"{message.author.display_name}: {choice(responses)}")
+    await bot.database.add_command_history(message.author.display_name, key)
+    return True
 
 
 def load_automod_regexes(bot):